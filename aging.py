@@ -0,0 +1,149 @@
+"""
+Aging Engine
+Recomputes Days Passed and the Aging bucket from each row's Offline Date /
+Beginning timestamp against "now", so aging stays correct between
+spreadsheet refreshes instead of trusting the exported Aging column.
+
+Buckets are (lower bound in whole days, label) pairs; a row falls in the
+last bucket whose bound is <= its Days Passed rounded to whole days, which
+is how the exports assign them.
+
+    python aging.py [workbook.xlsx] [--by Cluster] [--edges 0,11,31,101,181]
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+
+# Bucket lower bounds (days) and labels as they appear in each export
+DB_AGING = [(0, '1 - 05 Days'), (6, '6 - 15 Days'), (16, '16 - 30 Days'),
+            (31, '31 - 100 Days'), (101, '100+ Days')]
+DEVICE_AGING = [(0, '01 - 10 Days'), (11, '11 - 30 Days'), (31, '31 - 100 Days'),
+                (101, '100+ Days'), (181, '180+ Days')]
+
+# Timestamp column -> the bucket set its export uses
+DATE_COLUMNS = {
+    'Offline Date': DB_AGING,     # DB.xlsx
+    'Beginning': DEVICE_AGING,    # SPD / Rectifier / Rectifier Fan / DSE / events
+}
+
+# Region breakdown column: device sheets have Region, DB.xlsx uses Cluster
+REGION_COLUMNS = ['Region', 'Cluster']
+
+
+def buckets_from_edges(edges):
+    """Build (lower bound, label) buckets from ascending whole-day edges, e.g. [0, 11, 31]"""
+    edges = sorted(int(edge) for edge in edges)
+    if not edges:
+        raise ValueError("At least one bucket edge is required")
+    labels = [f"{low:02d} - {high - 1:02d} Days" for low, high in zip(edges, edges[1:])]
+    labels.append(f"{edges[-1]}+ Days")
+    return list(zip(edges, labels))
+
+
+def date_column(df):
+    """Return the sheet's timestamp column and its default buckets"""
+    for column, buckets in DATE_COLUMNS.items():
+        if column in df.columns:
+            return column, buckets
+    raise KeyError(f"No date column found; expected one of {list(DATE_COLUMNS)}")
+
+
+def region_column(df):
+    for column in REGION_COLUMNS:
+        if column in df.columns:
+            return column
+    return None
+
+
+def days_passed(dates, now=None):
+    """Fractional days from each timestamp to now (NaN where the date is blank)"""
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    dates = pd.to_datetime(dates, errors='coerce')
+    return (now - dates).to_numpy(dtype='timedelta64[ns]') / np.timedelta64(1, 'D')
+
+
+def bucket_codes(days, buckets):
+    """Bucket index per row by binary search over the bucket bounds; -1 for blanks"""
+    bounds = np.array([low for low, _ in buckets], dtype=np.float64)
+    days = np.asarray(days, dtype=np.float64)
+    codes = np.searchsorted(bounds, np.floor(days + 0.5), side='right') - 1
+    codes = np.maximum(codes, 0)  # Dates after now land in the first bucket
+    codes[np.isnan(days)] = -1
+    return codes
+
+
+def bucketize(days, buckets):
+    """Ordered categorical of bucket labels for an array of Days Passed"""
+    labels = [label for _, label in buckets]
+    return pd.Categorical.from_codes(bucket_codes(days, buckets),
+                                     dtype=pd.CategoricalDtype(labels, ordered=True))
+
+
+def recompute(df, now=None, buckets=None):
+    """Copy of the sheet with Days Passed and Aging recomputed against now"""
+    column, default_buckets = date_column(df)
+    buckets = buckets or default_buckets
+    days = days_passed(df[column], now)
+    out = df.copy()
+    out['Days Passed'] = days
+    out['Aging'] = bucketize(days, buckets)
+    return out
+
+
+def bucket_counts(df, by='region', now=None, buckets=None):
+    """Recomputed bucket counts, overall or per group: {group: {bucket: count}}
+
+    by is a column name, 'region' for the sheet's region column, or None for
+    the whole sheet ({bucket: count}). Every bucket is listed, zeros included.
+    """
+    column, default_buckets = date_column(df)
+    buckets = buckets or default_buckets
+    labels = [label for _, label in buckets]
+    codes = bucket_codes(days_passed(df[column], now), buckets)
+
+    if by == 'region':
+        by = region_column(df)
+    if by is None:
+        counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+        return dict(zip(labels, counts.tolist()))
+    if by not in df.columns:
+        raise KeyError(f"Column not found: {by}")
+
+    groups, names = pd.factorize(df[by], sort=True)
+    valid = (codes >= 0) & (groups >= 0)
+    flat = groups[valid] * len(labels) + codes[valid]
+    counts = np.bincount(flat, minlength=len(names) * len(labels)).reshape(len(names), len(labels))
+    return {str(name): dict(zip(labels, row.tolist())) for name, row in zip(names, counts)}
+
+
+def main():
+    from data_loader import read_sheet
+
+    parser = argparse.ArgumentParser(description="Recompute aging buckets from the timestamp column")
+    parser.add_argument('workbook', nargs='?', default='DB.xlsx')
+    parser.add_argument('--by', default='region',
+                        help="Group column ('region' for the sheet's region column, '' for the whole sheet)")
+    parser.add_argument('--edges', help='Comma-separated bucket lower bounds in days')
+    parser.add_argument('--now', help='Reference time (default: current time)')
+    args = parser.parse_args()
+
+    df = read_sheet(args.workbook)
+    buckets = buckets_from_edges(args.edges.split(',')) if args.edges else None
+    counts = bucket_counts(df, by=args.by or None, now=args.now, buckets=buckets)
+
+    print(f"⏱️  Aging of {args.workbook} as of {pd.Timestamp(args.now or pd.Timestamp.now()):%Y-%m-%d %H:%M}")
+    if all(isinstance(row, dict) for row in counts.values()):
+        for group, row in counts.items():
+            print(f"{group:20} " + '  '.join(f"{label}: {count}" for label, count in row.items()))
+    else:  # by=None, or no region column: {bucket: count} for the whole sheet
+        for label, count in counts.items():
+            print(f"{label:20} {count}")
+    if buckets is None and 'Aging' in df.columns:
+        fresh = recompute(df, args.now)['Aging'].astype(object)
+        stale = (fresh != df['Aging'].astype(object)) & (fresh.notna() | df['Aging'].notna())
+        print(f"\n{int(stale.sum())} of {len(df)} rows have a stale Aging value in the sheet")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,137 +3,162 @@ Column L Analysis Web Application
 A Flask-based web app for analyzing Excel data and displaying interactive charts
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import numpy as np
+from flask import Flask, render_template, request, jsonify, url_for, g
 import os
-import io
-import base64
-from datetime import datetime
+import hashlib
+import math
+import tempfile
+import time
 import warnings
+from workbook_cache import workbook_cache, file_key, content_key
+from data_loader import read_sheet, stream_columns, ensure_snapshot
+from column_l import column_l_projection, count_column_l
+from data_service import api, data_service
+from watcher import stream_api, WorkbookWatcher
+from site_index import sites_api
+from spatial import map_api
+from history import history_api, history_store, ingest_all
+from export import export_api
+from metrics import metrics, profiler, server_timing
+# create_pie_chart / create_bar_chart stay importable from app for benchmarks/run_benchmarks.py
+from charts import (create_pie_chart, create_bar_chart, create_chart_images,
+                    render_chart, chart_etag, chart_cache_stats, CHART_TYPES, CHART_FORMATS, CHART_PRESETS)
+from charts import warm_up as warm_up_charts
 warnings.filterwarnings('ignore')
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['UPLOAD_SPOOL_SIZE'] = 1024 * 1024  # Uploads above 1MB spill to a temp file
 
 # Create uploads folder if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-def analyze_excel_data(file_path):
-    """Analyze column L for Enfra and SMS LD counts"""
+# Pre-aggregated JSON for the HTML dashboards (/api/...)
+app.register_blueprint(api)
+app.register_blueprint(stream_api)
+app.register_blueprint(sites_api)
+app.register_blueprint(map_api)
+app.register_blueprint(history_api)
+app.register_blueprint(export_api)
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+    metrics.begin_request()
+    g.profiling = profiler.start(requested=request.args.get('profile') == '1')
+
+@app.after_request
+def record_timing(response):
+    """Latency histogram, Server-Timing header and (opt-in) profile dump per request"""
+    seconds = time.perf_counter() - g.get('request_start', time.perf_counter())
+    metrics.observe_request(request.endpoint, request.method, response.status_code, seconds)
+    timings = metrics.end_request()
+    if timings:
+        response.headers['Server-Timing'] = server_timing(timings)
+    if g.get('profiling'):
+        dump = profiler.stop(request.endpoint or 'unknown', seconds)
+        if dump:
+            response.headers['X-Profile-Dump'] = os.path.basename(dump)
+    return response
+
+@metrics.collector
+def cache_metrics():
+    """Workbook and chart cache counters as Prometheus samples"""
+    caches = {'workbook': workbook_cache.stats(), 'chart': chart_cache_stats()}
+    samples = []
+    for key, kind, help_text in [('hits', 'counter', 'Cache hits'), ('misses', 'counter', 'Cache misses'),
+                                 ('entries', 'gauge', 'Cached entries')]:
+        samples.append((f'rms_cache_{key}' + ('_total' if kind == 'counter' else ''), kind, help_text,
+                        [({'cache': name}, stats[key]) for name, stats in caches.items()]))
+    samples.append(('rms_cache_hit_ratio', 'gauge', 'Hits / lookups since start',
+                    [({'cache': name}, round(stats['hits'] / max(stats['hits'] + stats['misses'], 1), 4))
+                     for name, stats in caches.items()]))
+    return samples
+
+def analyze_excel_data(file_path, cache_key=None, streaming=False):
+    """Analyze column L for Enfra and SMS LD counts
+
+    file_path may also be a file object (uploads). Results are cached per
+    workbook; the key defaults to path + mtime + size, uploads pass a content
+    hash instead. Only column L is read; with streaming=True it is read row
+    by row through read-only openpyxl.
+    """
     try:
-        # Read Excel file
-        df = pd.read_excel(file_path)
-        
-        # Find column L
-        columns = df.columns.tolist()
-        column_l_data = None
-        column_l_name = None
+        key = cache_key or file_key(file_path)
+        cached = workbook_cache.get(key)
+        if cached is not None:
+            return cached['result'], None
         
-        if 'L' in columns:
-            column_l_data = df['L']
-            column_l_name = 'L'
-        elif len(columns) > 11:
-            column_l_data = df.iloc[:, 11]
-            column_l_name = columns[11]
-        else:
+        # Read only column L (columnar snapshot when fresh)
+        reader = stream_columns if streaming else read_sheet
+        with metrics.stage('read_excel'):
+            df = reader(file_path, columns=column_l_projection)
+        if df.columns.empty:
             return None, "Column L not found in the dataset"
         
-        # Count occurrences
-        enfra_count = 0
-        sms_ld_count = 0
-        other_count = 0
+        column_l_data = df.iloc[:, 0]
+        column_l_name = df.columns[0]
         
-        for value in column_l_data:
-            if pd.isna(value):
-                other_count += 1
-            else:
-                value_str = str(value).strip().upper()
-                if 'ENFRA' in value_str:
-                    enfra_count += 1
-                elif 'SMS LD' in value_str or 'SMS-LD' in value_str:
-                    sms_ld_count += 1
-                else:
-                    other_count += 1
-        
-        # Get unique values breakdown
-        unique_values = column_l_data.value_counts().head(10).to_dict()
+        with metrics.stage('classify'):
+            # Count occurrences
+            counts = count_column_l(column_l_data)
+            
+            # Get unique values breakdown
+            unique_values = column_l_data.value_counts().head(10).to_dict()
         
         result = {
-            'enfra_count': enfra_count,
-            'sms_ld_count': sms_ld_count,
-            'other_count': other_count,
+            'enfra_count': counts['enfra_count'],
+            'sms_ld_count': counts['sms_ld_count'],
+            'other_count': counts['other_count'],
             'total_rows': len(df),
             'column_name': column_l_name,
             'unique_values': unique_values
         }
         
+        workbook_cache.put(key, df, result)
         return result, None
         
     except Exception as e:
         return None, str(e)
 
-def create_pie_chart(enfra_count, sms_ld_count, other_count):
-    """Create a pie chart and return as base64 encoded image"""
-    labels = ['Enfra', 'SMS LD', 'Others']
-    sizes = [enfra_count, sms_ld_count, other_count]
-    colors = ['#ff9999', '#66b3ff', '#99ff99']
-    explode = (0.1, 0.1, 0.05)
-    
-    fig, ax = plt.subplots(figsize=(10, 8))
-    wedges, texts, autotexts = ax.pie(sizes, labels=labels, colors=colors, 
-                                       autopct='%1.1f%%', startangle=90, 
-                                       explode=explode, shadow=True,
-                                       textprops={'fontsize': 12, 'fontweight': 'bold'})
-    
-    for w in wedges:
-        w.set_linewidth(3)
-        w.set_edgecolor('white')
-    
-    ax.set_title('Column L Analysis - Enfra & SMS LD Distribution', 
-                  fontsize=16, fontweight='bold', pad=20)
-    
-    # Convert to base64
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-    plt.close()
-    
-    return img_base64
+def spool_upload(file):
+    """Copy an upload into a uniquely named spooled temp file, hashing it on the way"""
+    spool = tempfile.SpooledTemporaryFile(max_size=app.config['UPLOAD_SPOOL_SIZE'],
+                                          dir=app.config['UPLOAD_FOLDER'],
+                                          prefix='upload_', suffix='.xlsx')
+    hasher = hashlib.sha1()
+    for chunk in iter(lambda: file.stream.read(64 * 1024), b''):
+        hasher.update(chunk)
+        spool.write(chunk)
+    spool.seek(0)
+    return spool, hasher.hexdigest()
 
-def create_bar_chart(enfra_count, sms_ld_count, other_count):
-    """Create a bar chart and return as base64 encoded image"""
-    labels = ['Enfra', 'SMS LD', 'Others']
-    sizes = [enfra_count, sms_ld_count, other_count]
-    colors = ['#ff9999', '#66b3ff', '#99ff99']
+def build_analysis_response(result):
+    """Build the JSON body for an analysis, honouring ?charts=none|url|inline"""
+    counts = (result['enfra_count'], result['sms_ld_count'], result['other_count'])
+    response = {
+        'success': True,
+        'data': result
+    }
     
-    fig, ax = plt.subplots(figsize=(10, 8))
-    bars = ax.bar(labels, sizes, color=colors, alpha=0.8, edgecolor='black', linewidth=2)
-    ax.set_title('Count Comparison', fontsize=16, fontweight='bold')
-    ax.set_ylabel('Count', fontsize=12)
+    charts_mode = request.args.get('charts', 'url')
+    if charts_mode == 'inline':
+        images = create_chart_images(counts)
+        response['pie_chart'] = images['pie']
+        response['bar_chart'] = images['bar']
+    elif charts_mode == 'url':
+        params = {'enfra': counts[0], 'sms_ld': counts[1], 'other': counts[2]}
+        if request.args.get('preset') in CHART_PRESETS:
+            params['preset'] = request.args['preset']
+        fmt = request.args.get('format', 'png')
+        fmt = fmt if fmt in CHART_FORMATS else 'png'
+        response['chart_urls'] = {chart_type: url_for('chart', chart_type=chart_type, fmt=fmt, **params)
+                                  for chart_type in CHART_TYPES}
     
-    # Add value labels on bars
-    for bar, size in zip(bars, sizes):
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2., height + 0.5,
-                f'{size}', ha='center', va='bottom', fontweight='bold', fontsize=12)
-    
-    ax.grid(True, alpha=0.3)
-    ax.set_ylim(0, max(sizes) * 1.1 if max(sizes) > 0 else 10)
-    
-    # Convert to base64
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-    plt.close()
-    
-    return img_base64
+    metrics.observe_rows(request.endpoint, result['total_rows'])
+    with metrics.stage('encode'):
+        return jsonify(response)
 
 @app.route('/')
 def index():
@@ -155,31 +180,19 @@ def analyze():
         return jsonify({'error': 'Please upload an Excel file (.xlsx or .xls)'}), 400
     
     try:
-        # Save uploaded file
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"upload_{timestamp}.xlsx"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Analyze the file
-        result, error = analyze_excel_data(filepath)
+        # Buffer the upload; the spool is removed when closed, on every path
+        with metrics.stage('upload_save'):
+            spool, digest = spool_upload(file)
+        with spool:
+            # Analyze the file (.xls has no read-only streaming reader)
+            result, error = analyze_excel_data(spool, cache_key=content_key(digest),
+                                               streaming=file.filename.endswith('.xlsx'))
         
         if error:
             return jsonify({'error': error}), 400
         
         # Create charts
-        pie_chart = create_pie_chart(result['enfra_count'], result['sms_ld_count'], result['other_count'])
-        bar_chart = create_bar_chart(result['enfra_count'], result['sms_ld_count'], result['other_count'])
-        
-        # Clean up uploaded file
-        os.remove(filepath)
-        
-        return jsonify({
-            'success': True,
-            'data': result,
-            'pie_chart': pie_chart,
-            'bar_chart': bar_chart
-        })
+        return build_analysis_response(result)
         
     except Exception as e:
         return jsonify({'error': f'Error processing file: {str(e)}'}), 500
@@ -200,21 +213,113 @@ def analyze_default():
             return jsonify({'error': error}), 400
         
         # Create charts
-        pie_chart = create_pie_chart(result['enfra_count'], result['sms_ld_count'], result['other_count'])
-        bar_chart = create_bar_chart(result['enfra_count'], result['sms_ld_count'], result['other_count'])
-        
-        return jsonify({
-            'success': True,
-            'data': result,
-            'pie_chart': pie_chart,
-            'bar_chart': bar_chart
-        })
+        return build_analysis_response(result)
         
     except Exception as e:
         return jsonify({'error': f'Error processing file: {str(e)}'}), 500
 
+@app.route('/chart/<chart_type>.<any(png, svg):fmt>')
+@app.route('/chart/<chart_type>', defaults={'fmt': None})
+def chart(chart_type, fmt):
+    """Serve a cacheable chart image for the given counts
+
+    /chart/pie.png and /chart/pie.svg are fixed; /chart/pie picks SVG or PNG
+    from the Accept header. ?preset=thumbnail|default|wallboard sets size
+    and dpi; width / height / dpi override it.
+    """
+    if chart_type not in CHART_TYPES:
+        return jsonify({'error': f'Unknown chart type: {chart_type}'}), 404
+    preset = request.args.get('preset', 'default')
+    if preset not in CHART_PRESETS:
+        return jsonify({'error': f'Unknown preset: {preset}', 'presets': list(CHART_PRESETS)}), 400
+    negotiated = fmt is None
+    if negotiated:
+        mimetype = request.accept_mimetypes.best_match(list(CHART_FORMATS.values()), default='image/png')
+        fmt = next(name for name, media_type in CHART_FORMATS.items() if media_type == mimetype)
+    
+    (default_width, default_height), default_dpi = CHART_PRESETS[preset]
+    try:
+        counts = tuple(max(0, int(request.args.get(name, 0))) for name in ('enfra', 'sms_ld', 'other'))
+        width, height = (float(request.args.get(name, default)) for name, default in
+                         (('width', default_width), ('height', default_height)))
+        dpi = min(max(int(request.args.get('dpi', default_dpi)), 50), 300)
+    except ValueError:
+        return jsonify({'error': 'Chart parameters must be numeric'}), 400
+    if not (math.isfinite(width) and math.isfinite(height)):
+        return jsonify({'error': 'Chart width and height must be finite'}), 400
+    width, height = min(max(width, 2), 20), min(max(height, 2), 20)
+    
+    figsize = (width, height)
+    if fmt == 'svg':
+        dpi = 72  # Vector output does not depend on dpi; one cache entry per size
+    etag = chart_etag(chart_type, counts, figsize, dpi, fmt)
+    
+    # Answer revalidations without rendering
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        with metrics.stage('render'):
+            body = render_chart(chart_type, counts, figsize, dpi, fmt)
+        # The cached bytes are sent as they are: no base64, no JSON, no copy
+        response = app.response_class(body, mimetype=CHART_FORMATS[fmt])
+    if negotiated:
+        response.vary.add('Accept')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response
+
+@app.route('/cache-stats')
+def cache_stats():
+    """Report workbook and chart cache hit/miss counters"""
+    stats = workbook_cache.stats()
+    stats['charts'] = chart_cache_stats()
+    return jsonify(stats)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Request / stage latency histograms, input rows and cache counters for Prometheus"""
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def warm_up(default_file='DB.xlsx'):
+    """Pay the first-request costs up front, before the worker accepts traffic
+
+    Imports matplotlib and builds its font cache, starts the render pool,
+    snapshots and loads every workbook, analyses the default workbook and
+    renders its charts into the cache. Returns seconds per step.
+    """
+    timings = {}
+    start = time.perf_counter()
+    timings['charts'] = warm_up_charts()
+    step = time.perf_counter()
+    if os.path.exists(default_file):
+        ensure_snapshot(default_file)
+    data_service.warm()
+    timings['workbooks'] = time.perf_counter() - step
+    step = time.perf_counter()
+    if os.path.exists(default_file):
+        result, _ = analyze_excel_data(default_file)
+        if result is not None:
+            counts = (result['enfra_count'], result['sms_ld_count'], result['other_count'])
+            for chart_type in CHART_TYPES:
+                render_chart(chart_type, counts)
+    timings['default_analysis'] = time.perf_counter() - step
+    timings['total'] = time.perf_counter() - start
+    return timings
+
+# WSGI workers (e.g. gunicorn) warm up while importing the app, before taking requests
+if os.environ.get('RMS_WARM_UP') == '1':
+    warm_up()
+
 if __name__ == '__main__':
     print("🚀 Starting Column L Analysis Web Application...")
     print("📊 Access the app at: http://localhost:5000")
     print("Press CTRL+C to quit")
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    timings = warm_up()
+    print(f"🔥 Warm in {timings['total']:.2f}s (charts {timings['charts']:.2f}s, "
+          f"workbooks {timings['workbooks']:.2f}s): {', '.join(data_service.loaded())}")
+    logged = [name for name, counts in ingest_all(data_service).items() if 'error' not in counts]
+    print(f"🗂️  History logged for: {', '.join(logged)}")
+    WorkbookWatcher(history=history_store).start()
+    print("👀 Watching workbooks for changes (SSE at /api/stream, history in .history/)")
+    app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
@@ -0,0 +1,173 @@
+"""
+Batch Workbook Analysis
+Runs the Column L, aging and profiling analyses over many workbooks at
+once, without prompts or plot windows, so nightly jobs can process every
+regional export. Workbooks are spread over a process pool (largest
+first); results are written to one consolidated JSON file and/or one CSV
+row per workbook, with optional pie/bar charts per workbook (named after
+the workbook plus a short hash of its full path).
+
+    python batch.py exports/ "archive/*.xlsx" --jobs 8 --json results.json --csv results.csv --charts charts/
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from data_loader import read_sheet, promote_header
+from column_l import find_column_l, count_column_l
+from aging import bucket_counts, date_column, region_column
+from profiling import DataProfile
+from charts import render_chart_png
+
+WORKBOOK_PATTERNS = ('*.xlsx', '*.xls')
+
+
+def find_workbooks(sources):
+    """Expand directories and globs into a sorted, de-duplicated list of workbook paths"""
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            for pattern in WORKBOOK_PATTERNS:
+                paths += glob.glob(os.path.join(source, pattern))
+        else:
+            paths += glob.glob(source) or ([source] if os.path.exists(source) else [])
+    # Excel lock files (~$DB.xlsx) are not workbooks
+    paths = [path for path in paths if not os.path.basename(path).startswith('~$')]
+    return sorted(dict.fromkeys(os.path.normpath(path) for path in paths))
+
+
+def analyze_workbook(path, now=None, chart_dir=None):
+    """Column L counts, recomputed aging and a column profile of one workbook's first sheet"""
+    start = time.perf_counter()
+    result = {'path': path}
+    try:
+        df = promote_header(read_sheet(path))
+        profile = DataProfile(df)
+        result['profile'] = {
+            'rows': profile.rows,
+            'columns': profile.width,
+            'missing_cells': profile.missing_cells,
+            'completeness': round(profile.completeness, 2),
+            'memory_bytes': profile.memory_bytes,
+            'most_missing': {str(col): int(count) for col, count in profile.most_missing().items()},
+            'distinct': {str(col): int(count) for col, count in profile.distinct.items()},
+        }
+
+        series, column_name = find_column_l(df)
+        if series is not None:
+            result['column_l'] = {'column': str(column_name), **count_column_l(series)}
+
+        try:
+            column, _ = date_column(df)
+        except KeyError:
+            column = None
+        if column is not None:
+            result['aging'] = {
+                'date_column': column,
+                'buckets': bucket_counts(df, by=None, now=now),
+                'by_region': bucket_counts(df, now=now) if region_column(df) else {},
+            }
+
+        if chart_dir and 'column_l' in result:
+            counts = tuple(result['column_l'][key] for key in ('enfra_count', 'sms_ld_count', 'other_count'))
+            # Same-named exports from different directories get different files
+            stem = os.path.splitext(os.path.basename(path))[0]
+            stem += '_' + hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]
+            result['charts'] = {}
+            for chart_type in ('pie', 'bar'):
+                chart_path = os.path.join(chart_dir, f"{stem}_{chart_type}.png")
+                with open(chart_path, 'wb') as f:
+                    f.write(render_chart_png(chart_type, counts))
+                result['charts'][chart_type] = chart_path
+    except Exception as e:  # One unreadable export must not sink the batch
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def run_batch(paths, jobs=None, now=None, chart_dir=None, progress=None):
+    """Analyze every workbook across `jobs` processes; results come back in input order"""
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(paths) or 1))
+    if chart_dir:
+        os.makedirs(chart_dir, exist_ok=True)
+    results = {}
+    if jobs == 1:
+        for path in paths:
+            results[path] = analyze_workbook(path, now, chart_dir)
+            if progress:
+                progress(results[path])
+    else:
+        # Largest workbooks first so one big export does not finish last on its own
+        ordered = sorted(paths, key=lambda path: os.path.getsize(path) if os.path.exists(path) else 0, reverse=True)
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(analyze_workbook, path, now, chart_dir) for path in ordered]
+            for future in as_completed(futures):
+                result = future.result()
+                results[result['path']] = result
+                if progress:
+                    progress(result)
+    return [results[path] for path in paths]
+
+
+def to_rows(results):
+    """One flat CSV row per workbook"""
+    rows = []
+    for result in results:
+        row = {'path': result['path'], 'seconds': result['seconds'], 'error': result.get('error')}
+        profile = result.get('profile', {})
+        for key in ('rows', 'columns', 'missing_cells', 'completeness', 'memory_bytes'):
+            row[key] = profile.get(key)
+        row.update({key: value for key, value in result.get('column_l', {}).items() if key != 'column'})
+        aging = result.get('aging')
+        if aging:
+            row['date_column'] = aging['date_column']
+            row.update({f"aging: {label}": count for label, count in aging['buckets'].items()})
+        rows.append(row)
+    return pd.DataFrame(rows).convert_dtypes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze many workbooks in parallel")
+    parser.add_argument('sources', nargs='+', help='Workbook files, directories or glob patterns')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--json', default='batch_results.json', help='Consolidated JSON output')
+    parser.add_argument('--csv', help='Also write one CSV row per workbook')
+    parser.add_argument('--charts', help='Directory for per-workbook pie and bar charts')
+    parser.add_argument('--now', help='Reference time for aging (default: current time)')
+    args = parser.parse_args()
+
+    paths = find_workbooks(args.sources)
+    if not paths:
+        parser.error(f"No workbooks found in {args.sources}")
+
+    def report(result):
+        status = f"❌ {result['error']}" if 'error' in result else f"✅ {result['profile']['rows']} rows"
+        print(f"{result['path']}: {status} ({result['seconds']:.2f}s)")
+
+    start = time.perf_counter()
+    results = run_batch(paths, jobs=args.jobs, now=args.now, chart_dir=args.charts, progress=report)
+    elapsed = time.perf_counter() - start
+
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated': pd.Timestamp.now().isoformat(timespec='seconds'),
+            'now': args.now,
+            'workbooks': results,
+        }, f, indent=2, default=str)
+    if args.csv:
+        to_rows(results).to_csv(args.csv, index=False)
+
+    failed = sum('error' in result for result in results)
+    busy = sum(result['seconds'] for result in results)
+    print(f"\n📦 {len(results)} workbooks in {elapsed:.2f}s ({busy:.2f}s of work, {failed} failed) -> {args.json}"
+          + (f", {args.csv}" if args.csv else ''))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,71 @@
+"""
+Compact Representation Benchmark
+Resamples the DB.xlsx rows to 100k and 1M sites (unique Site Ids, the
+real Sub Region / Team lead / History values) and compares the memory of
+the sheet as loaded against compact_frame(), together with the cost of
+compacting and of the operations the service runs on the Site Id column.
+
+    python benchmarks/compact_memory.py [--rows 100000,1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from compact import compact_frame, memory_bytes  # noqa: E402
+from data_loader import read_sheet  # noqa: E402
+
+
+def base_frame(rows, seed=0):
+    """The DB.xlsx sheet as loaded, resampled to `rows` rows with unique Site Ids"""
+    base = read_sheet(os.path.join(ROOT, 'DB.xlsx'))
+    df = base.sample(n=rows, replace=True, random_state=seed).reset_index(drop=True)
+    clusters = df['Site Id'].astype(str).str.strip().str.split('-').str[1]
+    df['Site Id'] = [f"ES2-{cluster}-{i % 100_000:05d}" if i < 100_000 else f"EUS-{cluster}-{i:07d}"
+                     for i, cluster in enumerate(clusters)]
+    # Every row its own string object, as the xlsx reader produces them
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = [value if not isinstance(value, str) else ''.join(list(value)) for value in df[col]]
+    return df
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='100000,1000000')
+    args = parser.parse_args()
+
+    for rows in [int(r) for r in args.rows.split(',')]:
+        df = base_frame(rows)
+        compact, compact_seconds = timed(lambda: compact_frame(df))
+        print(f"\nRows: {rows:,}  (compacted in {compact_seconds:.2f}s)")
+        print(f"{'column':14} {'loaded (MB)':>12} {'compact (MB)':>13} {'dtype':>10}")
+        for col in df.columns:
+            before, after = memory_bytes(df[[col]]), memory_bytes(compact[[col]])
+            print(f"{col:14} {before / 1e6:>12.2f} {after / 1e6:>13.2f} {str(compact[col].dtype):>10}")
+        before, after = memory_bytes(df), memory_bytes(compact)
+        print(f"{'total':14} {before / 1e6:>12.2f} {after / 1e6:>13.2f}   ({1 - after / before:.0%} less)")
+
+        site = df['Site Id'].iloc[rows // 2]
+        print(f"{'operation (s)':28} {'loaded':>8} {'compact':>8}")
+        for label, fn in [('Site Id == one site', lambda frame: (frame['Site Id'] == site).sum()),
+                          ('Site Id astype(str)', lambda frame: frame['Site Id'].astype(str)),
+                          ('count by Sub Region', lambda frame: frame.groupby('Sub Region', observed=True).size()),
+                          ('count by Team lead', lambda frame: frame['Team lead'].value_counts())]:
+            _, plain_seconds = timed(lambda: fn(df))
+            _, compact_seconds = timed(lambda: fn(compact))
+            print(f"{label:28} {plain_seconds:>8.3f} {compact_seconds:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Aggregate Cube Benchmark
+Compares AggregateCube.query against the equivalent pandas groupby on a
+synthetic frame resampled from DB.xlsx.
+
+    python benchmarks/cube_query.py [--rows 1000000] [--repeat 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cube import AggregateCube, DIMENSIONS  # noqa: E402
+from column_l import classify_codes, CATEGORIES  # noqa: E402
+from data_loader import read_sheet  # noqa: E402
+
+QUERIES = [
+    ((), {}),
+    (('Sub Region',), {}),
+    (('Sub Region', 'Aging'), {'Domain': 'Enfra'}),
+    (('Cluster', 'Device Brand'), {'Aging': ['16 - 30 Days', '31 - 100 Days']}),
+    (('Team lead',), {'Sub Region': 'Sukkur', 'Domain': 'SMS LD'}),
+]
+
+
+def synthetic_frame(rows, seed=0):
+    """Resample the DB.xlsx rows up to the requested size"""
+    base = read_sheet(os.path.join(ROOT, 'DB.xlsx'), columns=DIMENSIONS)
+    sample = base.sample(n=rows, replace=True, random_state=seed).reset_index(drop=True)
+    return sample.astype({dim: 'category' for dim in DIMENSIONS})
+
+
+def pandas_query(df, domain, by, filters):
+    """Baseline: boolean filter then groupby().size() on the raw rows"""
+    mask = np.ones(len(df), dtype=bool)
+    for dim, values in filters.items():
+        values = [values] if isinstance(values, str) else values
+        column = domain if dim == 'Domain' else df[dim]
+        mask &= column.isin(values).to_numpy()
+    subset = df[mask]
+    if not by:
+        return len(subset)
+    keys = [domain[mask] if dim == 'Domain' else subset[dim] for dim in by]
+    return subset.groupby(keys, observed=True).size()
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    df = synthetic_frame(args.rows)
+    start = time.perf_counter()
+    cube = AggregateCube(df)
+    print(f"Rows: {len(df):,}  cube shape: {cube.counts.shape}  build: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # The baseline gets the Domain roll-up precomputed too
+    domain = pd.Series(np.asarray(CATEGORIES)[classify_codes(df['Domain'])], index=df.index, dtype='category')
+
+    print(f"{'query':60} {'cube µs':>10} {'pandas ms':>10} {'speedup':>9}")
+    for by, filters in QUERIES:
+        cube_seconds = timed(lambda: cube.query(by=by, filters=filters), args.repeat)
+        pandas_seconds = timed(lambda: pandas_query(df, domain, by, filters), max(1, args.repeat // 10))
+        label = f"by={list(by)} filters={filters}"
+        print(f"{label[:60]:60} {cube_seconds * 1e6:>10.1f} {pandas_seconds * 1e3:>10.2f} "
+              f"{pandas_seconds / cube_seconds:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Streaming Export Benchmark
+Exports every row of a DB sheet resampled to 100k and 1M rows (compact
+representation, as the data service holds it) and reports the peak
+traced memory, the time to the first chunk and the total time per
+format. The baseline builds the same CSV / JSON lines in memory first,
+as a non-streaming endpoint would.
+
+    python benchmarks/export_stream.py [--rows 100000,1000000] [--xlsx-rows 100000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from compact import compact_frame  # noqa: E402
+from data_loader import read_sheet  # noqa: E402
+from export import export_stream, RowExport, _plain  # noqa: E402
+
+NOW = '2026-01-01'
+
+
+def base_frame(rows, seed=0):
+    """DB.xlsx rows resampled to `rows` rows with unique Site Ids"""
+    base = read_sheet(os.path.join(ROOT, 'DB.xlsx'))
+    df = base.sample(n=rows, replace=True, random_state=seed).reset_index(drop=True)
+    clusters = df['Site Id'].astype(str).str.strip().str.split('-').str[1]
+    df['Site Id'] = [f"ES2-{cluster}-{i:07d}" for i, cluster in enumerate(clusters)]
+    return compact_frame(df)
+
+
+def in_memory(df, fmt):
+    """Whole result built before the first byte is sent"""
+    export = RowExport(df, now=NOW)
+    full = pd.concat(list(export))
+    if fmt == 'csv':
+        yield _plain(full).to_csv(index=False).encode('utf-8')
+    else:
+        header = list(full.columns)
+        yield ''.join(json.dumps(dict(zip(header, row)), default=str, ensure_ascii=False) + '\n'
+                      for row in _plain(full).itertuples(index=False, name=None)).encode('utf-8')
+
+
+def measure(make_blocks):
+    """(peak traced MB, seconds to first block, total seconds, bytes)
+
+    Timed untraced, then run again under tracemalloc (which slows it several-fold) for the peak.
+    """
+    start = time.perf_counter()
+    first, size = None, 0
+    for block in make_blocks():
+        if first is None:
+            first = time.perf_counter() - start
+        size += len(block)
+    total = time.perf_counter() - start
+
+    tracemalloc.start()
+    for block in make_blocks():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6, first, total, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='100000,1000000')
+    parser.add_argument('--xlsx-rows', type=int, default=100_000, help='Largest sheet exported as XLSX (slow)')
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'export':18} {'peak MB':>9} {'first (s)':>10} {'total (s)':>10} {'output MB':>10}")
+    for rows in [int(r) for r in args.rows.split(',')]:
+        df = base_frame(rows)
+        cases = [('csv streamed', lambda: export_stream(df, 'csv', now=NOW)),
+                 ('csv in memory', lambda: in_memory(df, 'csv')),
+                 ('jsonl streamed', lambda: export_stream(df, 'jsonl', now=NOW)),
+                 ('jsonl in memory', lambda: in_memory(df, 'jsonl'))]
+        if rows <= args.xlsx_rows:
+            cases.append(('xlsx write-only', lambda: export_stream(df, 'xlsx', now=NOW)))
+        for label, make_blocks in cases:
+            peak, first, total, size = measure(make_blocks)
+            print(f"{rows:>10,} {label:18} {peak:>9.1f} {first:>10.3f} {total:>10.2f} {size / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
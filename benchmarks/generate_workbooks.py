@@ -0,0 +1,146 @@
+"""
+Synthetic RMS Workbook Generator
+Writes DB.xlsx / SPD.xlsx shaped workbooks with the real headers at any
+row count. Categorical columns follow the value distribution (including
+blanks) of the real workbook; Site Ids, dates, aging and History text are
+generated.
+
+    python benchmarks/generate_workbooks.py [--rows 1000,10000,100000,1000000] [--out benchmarks/data]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from openpyxl import Workbook
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from data_loader import read_sheet  # noqa: E402
+from aging import DB_AGING, DEVICE_AGING, bucket_codes  # noqa: E402
+
+DEFAULT_OUT = os.path.join(ROOT, 'benchmarks', 'data')
+
+KINDS = {
+    'DB': {'source': 'DB.xlsx', 'date_column': 'Offline Date', 'aging': DB_AGING,
+           'text_columns': ['Reason', 'History']},
+    'SPD': {'source': 'SPD.xlsx', 'date_column': 'Beginning', 'aging': DEVICE_AGING,
+            'text_columns': ['History | Issue']},
+}
+
+HISTORY_TEMPLATES = [
+    'RMS faulty submitted for R&R',
+    'Swapped to {code}{n} | {n} in R&R',
+    'ECM Swapped to {code}{n} | {n} ECM in R&R',
+    'SIM Blocked | Online on POC SIM',
+    'Area Data Blocked',
+    'Access Issue | Flood Water',
+    'Visit Required',
+    'Anttena Required',
+    'SIM Data Finished',
+    'Data Blocked',
+]
+
+
+def _sampler(series, rng):
+    """Draw values with the same frequencies (blanks included) as a real column"""
+    counts = series.astype(object).where(series.notna(), None).value_counts(dropna=False)
+    values = np.array(counts.index.tolist(), dtype=object)
+    weights = counts.to_numpy(dtype=float) / counts.sum()
+    return lambda n: rng.choice(values, size=n, p=weights)
+
+
+def _site_ids(n, cluster_codes, rng):
+    prefixes = rng.choice(np.array(['ES2', 'EUS']), size=n, p=[0.85, 0.15])
+    codes = rng.choice(cluster_codes, size=n)
+    numbers = rng.integers(1, 10000, size=n)
+    return [f"{p}-{c}-{num:05d}" for p, c, num in zip(prefixes, codes, numbers)]
+
+
+def _history(n, cluster_codes, rng, blank_ratio=0.6):
+    templates = rng.integers(0, len(HISTORY_TEMPLATES), size=n)
+    codes = rng.choice(cluster_codes, size=n)
+    numbers = rng.integers(1000, 10000, size=n)
+    blanks = rng.random(n) < blank_ratio
+    return [None if blank else HISTORY_TEMPLATES[t].format(code=c, n=num)
+            for blank, t, c, num in zip(blanks, templates, codes, numbers)]
+
+
+def generate_rows(kind, rows, seed=0, now=None):
+    """Yield row tuples (header first) for a synthetic workbook of the given kind"""
+    spec = KINDS[kind]
+    rng = np.random.default_rng(seed)
+    now = now or datetime.now().replace(second=0, microsecond=0)
+    template = read_sheet(os.path.join(ROOT, spec['source']))
+    columns = list(template.columns)
+    cluster_codes = np.array(sorted({site.split('-')[1] for site in template['Site Id'].dropna()}))
+
+    labels = np.array([label for _, label in spec['aging']], dtype=object)
+
+    yield tuple(columns)
+    chunk = 50_000
+    for start in range(0, rows, chunk):
+        n = min(chunk, rows - start)
+        data = {}
+        for col in columns:
+            if col == 'Site Id':
+                data[col] = _site_ids(n, cluster_codes, rng)
+            elif col == spec['date_column']:
+                minutes = rng.integers(60, 400 * 24 * 60, size=n)
+                data[col] = [now - timedelta(minutes=int(m)) for m in minutes]
+                days = minutes / (24 * 60)
+                data['Days Passed'] = days
+                data['Aging'] = labels[bucket_codes(days, spec['aging'])]
+            elif col in ('Days Passed', 'Aging'):
+                continue
+            elif col in spec['text_columns']:
+                data[col] = _history(n, cluster_codes, rng)
+            else:
+                data[col] = _sampler(template[col], rng)(n)
+        for i in range(n):
+            yield tuple(data[col][i] for col in columns)
+
+
+def write_workbook(kind, rows, path, seed=0):
+    """Write a synthetic workbook with openpyxl's constant-memory write-only mode"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Sites' if kind == 'DB' else 'All')
+    for row in generate_rows(kind, rows, seed):
+        ws.append([float(v) if isinstance(v, np.floating) else v for v in row])
+    wb.save(path)
+    return path
+
+
+def workbook_path(kind, rows, out_dir=DEFAULT_OUT):
+    return os.path.join(out_dir, f"{kind}_{rows}.xlsx")
+
+
+def ensure_workbook(kind, rows, out_dir=DEFAULT_OUT):
+    """Generate the workbook once; later runs reuse it"""
+    path = workbook_path(kind, rows, out_dir)
+    if not os.path.exists(path):
+        os.makedirs(out_dir, exist_ok=True)
+        write_workbook(kind, rows, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='1000,10000,100000,1000000')
+    parser.add_argument('--kinds', default='DB,SPD')
+    parser.add_argument('--out', default=DEFAULT_OUT)
+    args = parser.parse_args()
+
+    for kind in args.kinds.split(','):
+        for rows in map(int, args.rows.split(',')):
+            start = time.perf_counter()
+            path = ensure_workbook(kind, rows, args.out)
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            print(f"📄 {path}: {rows:,} rows, {size_mb:.1f} MB ({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
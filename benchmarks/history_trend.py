@@ -0,0 +1,122 @@
+"""
+History Store Benchmark
+Ingests a year of synthetic daily DB.xlsx exports (a few percent of sites
+changing, going offline, recovering or disappearing each day) into the
+history store, then times a 90-day trend query before and after compaction.
+The baseline keeps every daily export as a full Feather snapshot and
+answers the same query by scanning the snapshots in range.
+
+    python benchmarks/history_trend.py [--sites 5000] [--days 365] [--churn 0.03]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from history import HistoryStore  # noqa: E402
+from data_loader import read_sheet, to_arrow  # noqa: E402
+
+START = pd.Timestamp('2024-11-11')
+GROUP_BY = ['Sub Region']
+
+
+def base_frame(sites, seed=0):
+    """Resample the DB.xlsx rows to the requested number of distinct sites"""
+    base = read_sheet(os.path.join(ROOT, 'DB.xlsx'))
+    df = base.sample(n=sites, replace=True, random_state=seed).reset_index(drop=True)
+    df['Site Id'] = [f"ES2-{site.split('-')[1]}-{i:06d}" for i, site in enumerate(df['Site Id'].astype(str))]
+    return df
+
+
+def daily_exports(df, days, churn, seed=0):
+    """Yield (date, export) with `churn` of the sites touched per day"""
+    rng = np.random.default_rng(seed)
+    offline = df['Offline Date'].copy()
+    for day in range(days):
+        date = START + pd.Timedelta(days=day)
+        touched = rng.random(len(df)) < churn
+        # Touched sites flip between offline (dated today) and recovered
+        offline[touched] = np.where(offline[touched].isna(), date, pd.NaT)
+        export = df.assign(**{'Offline Date': offline})
+        export['Days Passed'] = (date - export['Offline Date']).dt.days
+        gone = rng.random(len(df)) < churn / 10  # Sites briefly dropped from the export
+        yield date, export[~gone]
+
+
+def naive_trend(directory, start, end):
+    """Open rows per day and Sub Region from full daily snapshots"""
+    counts = {}
+    for date in pd.date_range(start, end, freq='D'):
+        df = feather.read_table(os.path.join(directory, f"{date:%Y-%m-%d}.arrow"),
+                                columns=GROUP_BY + ['Offline Date']).to_pandas()
+        counts[date] = df[df['Offline Date'].notna()].groupby(GROUP_BY, observed=True).size()
+    return pd.DataFrame(counts).fillna(0)
+
+
+def disk_mb(directory):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(directory) for f in files) / 1e6
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--churn', type=float, default=0.03)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='rms-history-')
+    snapshots = os.path.join(work, 'snapshots')
+    os.makedirs(snapshots)
+    # Daily partitions are kept until the explicit compaction below
+    store = HistoryStore(os.path.join(work, 'history'), compact_after=args.days + 1)
+    try:
+        df = base_frame(args.sites)
+        ingest_seconds = snapshot_seconds = 0.0
+        for date, export in daily_exports(df, args.days, args.churn):
+            _, seconds = timed(lambda: store.ingest('db', export, date))
+            ingest_seconds += seconds
+            _, seconds = timed(lambda: feather.write_feather(to_arrow(export), os.path.join(
+                snapshots, f"{date:%Y-%m-%d}.arrow"), compression='zstd'))
+            snapshot_seconds += seconds
+
+        end = START + pd.Timedelta(days=args.days - 1)
+        start = max(START, end - pd.Timedelta(days=89))
+        print(f"Sites: {args.sites:,}  days: {args.days}  churn: {args.churn:.0%}")
+        print(f"{'':28} {'history':>10} {'snapshots':>10}")
+        print(f"{'ingest total (s)':28} {ingest_seconds:>10.2f} {snapshot_seconds:>10.2f}")
+        print(f"{'disk (MB)':28} {disk_mb(store.root):>10.2f} {disk_mb(snapshots):>10.2f}")
+
+        expected, naive_seconds = timed(lambda: naive_trend(snapshots, start, end))
+        (_, series), daily_seconds = timed(lambda: store.trend('db', start, end, by=GROUP_BY))
+        for (region,), counts in series.items():
+            if region in expected.index:
+                assert (expected.loc[region].to_numpy() == counts).all(), region
+        print(f"{'90-day trend, daily (s)':28} {daily_seconds:>10.3f} {naive_seconds:>10.3f}")
+
+        months, compact_seconds = timed(lambda: store.compact('db', end))
+        _, compacted_seconds = timed(lambda: store.trend('db', start, end, by=GROUP_BY))
+        print(f"{'compaction (s)':28} {compact_seconds:>10.2f}  ({len(months)} months, "
+              f"{len(store.partitions('db'))} files left)")
+        print(f"{'90-day trend, compacted (s)':28} {compacted_seconds:>10.3f}")
+        print(f"{'disk after compaction (MB)':28} {disk_mb(store.root):>10.2f}")
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
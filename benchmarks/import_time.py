@@ -0,0 +1,131 @@
+"""
+Startup Time Benchmark
+Imports each entry-point module in a fresh interpreter under
+`python -X importtime`. Plotting and Excel libraries (matplotlib, seaborn,
+openpyxl) must not be in sys.modules after the import; they load on first
+use. Import times are compared as a ratio to a cold `import pandas` timed
+in the same run, so the budget in import_budget.json holds on slower or
+busier machines; only a module growing well beyond its ratio fails.
+
+    python benchmarks/import_time.py                 # exit 1 on regression
+    python benchmarks/import_time.py --update        # record the current ratios as the budget
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(ROOT, 'benchmarks', 'import_budget.json')
+
+# Scripts that do their work at module level (check_aging.py, examine_data.py) are left out
+MODULES = ['app', 'data_loader', 'charts', 'batch', 'column_l_analysis', 'python_dashboard', 'aging']
+# Loaded on first use only (first chart, first openpyxl read)
+DEFERRED = ['matplotlib', 'seaborn', 'openpyxl', 'mpl_toolkits']
+# Every data module imports pandas; timing it in the same run cancels out the machine's speed
+BASELINE = 'pandas'
+
+# Differences below this are noise, whatever the ratio
+MIN_DELTA_SECONDS = 0.05
+
+_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def import_profile(module):
+    """(cumulative seconds, {top-level package: cumulative seconds}, top-level packages in sys.modules)"""
+    code = f'import {module}, sys; print("\\n".join(sorted({{name.split(".")[0] for name in sys.modules}})))'
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    total, packages = 0, {}
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match[2]) / 1e6, len(match[3]), match[4]
+        if depth == 1:  # Imported directly by the interpreter or the -c statement
+            total += cumulative
+        root = name.split('.')[0]
+        packages[root] = max(packages.get(root, 0), cumulative)
+    return total, packages, set(proc.stdout.split())
+
+
+def best_time(module, repeat):
+    """Fastest of `repeat` cold imports: (seconds, packages, loaded)"""
+    return min((import_profile(module) for _ in range(repeat)), key=lambda run: run[0])
+
+
+def measure(modules, repeat):
+    """Best of `repeat` cold imports per module, with its ratio to the baseline import"""
+    baseline = best_time(BASELINE, repeat)[0]
+    results = {}
+    for module in modules:
+        total, packages, loaded = best_time(module, repeat)
+        results[module] = {
+            'seconds': round(total, 4),
+            'ratio': round(total / baseline, 3),
+            'deferred_loaded': sorted(name for name in DEFERRED if name in loaded),
+            'heaviest': dict(sorted(packages.items(), key=lambda item: -item[1])[:5]),
+        }
+    return baseline, results
+
+
+def compare(results, baseline, budget, tolerance):
+    """Ratios more than `tolerance` over the budget (and MIN_DELTA_SECONDS slower), and eager heavy imports"""
+    problems = []
+    for module, result in results.items():
+        if result['deferred_loaded']:
+            problems.append(f"{module}: {', '.join(result['deferred_loaded'])} in sys.modules after import")
+        allowed = budget.get(module)
+        if allowed is None:
+            continue
+        delta = result['ratio'] - allowed
+        if delta > allowed * tolerance and delta * baseline > MIN_DELTA_SECONDS:
+            problems.append(f"{module}: {allowed:.2f}x -> {result['ratio']:.2f}x {BASELINE} "
+                            f"({result['seconds']:.3f} s)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', default=','.join(MODULES), help='Comma-separated module names')
+    parser.add_argument('--repeat', type=int, default=5, help='Cold imports per module; the fastest counts')
+    parser.add_argument('--budget', default=BUDGET_FILE)
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed growth of the ratio (0.5 = 50%%)')
+    parser.add_argument('--update', action='store_true', help='Write the measured ratios as the new budget')
+    args = parser.parse_args()
+
+    budget = {}
+    if os.path.exists(args.budget):
+        with open(args.budget) as f:
+            budget = json.load(f)
+
+    baseline, results = measure(args.only.split(','), args.repeat)
+    print(f"import {BASELINE}: {baseline:.3f} s")
+    print(f"{'module':20} {'import':>10} {'ratio':>7} {'budget':>7}  heaviest")
+    for module, result in results.items():
+        allowed = f"{budget[module]:.2f}x" if module in budget else '-'
+        heaviest = ', '.join(f"{name} {seconds:.2f}" for name, seconds in list(result['heaviest'].items())[:3])
+        print(f"{module:20} {result['seconds']:>8.3f} s {result['ratio']:>6.2f}x {allowed:>7}  {heaviest}")
+
+    if args.update:
+        budget.update({module: result['ratio'] for module, result in results.items()})
+        with open(args.budget, 'w') as f:
+            json.dump(dict(sorted(budget.items())), f, indent=2)
+            f.write('\n')
+        print(f"Budget written to {args.budget}")
+        return
+
+    problems = compare(results, baseline, budget, args.tolerance)
+    for problem in problems:
+        print(f"⚠️  Regression: {problem}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
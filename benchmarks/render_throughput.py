@@ -0,0 +1,59 @@
+"""
+Chart Render Load Test
+Measures charts/second through charts.RenderPool for increasing worker counts.
+
+    python benchmarks/render_throughput.py [--charts 48] [--workers 1,2,4] [--kinds thread,process]
+
+Every chart uses distinct counts so the render cache never short-circuits.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from charts import RenderPool, CHART_TYPES  # noqa: E402
+
+_unique_counts = itertools.count(1)
+
+
+def run(kind, workers, n_charts):
+    """Render n_charts on a fresh pool and return charts per second"""
+    pool = RenderPool(workers=workers, kind=kind)
+    chart_types = itertools.cycle(CHART_TYPES)
+    # Warm the workers (font cache, imports) before timing
+    for future in [pool.submit('bar', (0, 0, i)) for i in range(workers)]:
+        future.result()
+
+    start = time.perf_counter()
+    futures = [pool.submit(next(chart_types), (next(_unique_counts), 20, 271))
+               for _ in range(n_charts)]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    return n_charts / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--charts', type=int, default=48)
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--kinds', default='thread,process')
+    args = parser.parse_args()
+
+    print(f"CPUs available: {os.cpu_count()}")
+    print(f"{'pool':8} {'workers':>7} {'charts/s':>9} {'speedup':>8}")
+    for kind in args.kinds.split(','):
+        baseline = None
+        for workers in map(int, args.workers.split(',')):
+            rate = run(kind, workers, args.charts)
+            baseline = baseline or rate
+            print(f"{kind:8} {workers:>7} {rate:>9.2f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+RMS Benchmark Suite
+Runs each benchmark in a fresh process against synthetic DB workbooks and
+records wall time and peak RSS. Compare against a saved run to catch
+regressions:
+
+    python benchmarks/run_benchmarks.py --rows 1000,10000 --output bench.json
+    python benchmarks/run_benchmarks.py --rows 1000,10000 --baseline bench.json --tolerance 0.25
+
+Exits with status 1 when any benchmark is slower or larger than the
+baseline by more than the tolerance.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(ROOT)
+sys.path.insert(0, REPO)
+
+
+def _rss_peak_mb():
+    """Peak resident set size of this process (VmHWM), in MB"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _reset_rss_peak():
+    """Reset VmHWM so the peak covers only the timed section (Linux only)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+# Each benchmark does its untimed setup and returns the callable to time
+
+def bench_analyze_excel_data(path):
+    import app
+    return lambda: app.analyze_excel_data(path)
+
+
+def _counts(path):
+    import app
+    result, _ = app.analyze_excel_data(path)
+    return result['enfra_count'], result['sms_ld_count'], result['other_count']
+
+
+def bench_create_pie_chart(path):
+    import app
+    counts = _counts(path)
+    return lambda: app.create_pie_chart(*counts)
+
+
+def bench_create_bar_chart(path):
+    import app
+    counts = _counts(path)
+    return lambda: app.create_bar_chart(*counts)
+
+
+def bench_load_data(path):
+    from python_dashboard import ExcelDashboard
+    return lambda: ExcelDashboard(path).load_data()
+
+
+def bench_generate_insights(path):
+    from python_dashboard import ExcelDashboard
+    dashboard = ExcelDashboard(path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        dashboard.load_data()
+    return dashboard.generate_insights
+
+
+def bench_analyze_endpoint(path):
+    import app
+    client = app.app.test_client()
+    with open(path, 'rb') as f:
+        payload = f.read()
+
+    def run():
+        response = client.post('/analyze', data={'file': (io.BytesIO(payload), 'upload.xlsx')})
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return run
+
+
+def bench_analyze_default_endpoint(path):
+    # /analyze-default reads DB.xlsx from the working directory
+    workdir = tempfile.mkdtemp(prefix='rms_bench_')
+    os.symlink(os.path.abspath(path), os.path.join(workdir, 'DB.xlsx'))
+    os.chdir(workdir)
+    import app
+    client = app.app.test_client()
+
+    def run():
+        response = client.get('/analyze-default')
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return run
+
+
+BENCHMARKS = {name[len('bench_'):]: fn for name, fn in globals().items() if name.startswith('bench_')}
+
+
+def run_child(name, path):
+    """Run one benchmark in this process and print its measurements as JSON"""
+    sys.stdout = io.StringIO()  # Silence the dashboards' progress output
+    fn = BENCHMARKS[name](path)
+    _reset_rss_peak()
+    start = time.perf_counter()
+    fn()
+    wall = time.perf_counter() - start
+    peak = _rss_peak_mb()
+    sys.stdout = sys.__stdout__
+    print(json.dumps({'wall_seconds': wall, 'peak_rss_mb': peak}))
+
+
+def run_suite(rows_list, names):
+    from generate_workbooks import ensure_workbook
+
+    results = []
+    for rows in rows_list:
+        path = ensure_workbook('DB', rows)
+        for name in names:
+            proc = subprocess.run([sys.executable, __file__, '--child', name, path],
+                                  capture_output=True, text=True, cwd=REPO)
+            if proc.returncode != 0:
+                print(f"❌ {name} @ {rows:,} rows failed:\n{proc.stderr.strip()}")
+                continue
+            measured = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append({'benchmark': name, 'rows': rows, **measured})
+            print(f"{name:28} {rows:>10,} {measured['wall_seconds']:>10.3f} s {measured['peak_rss_mb']:>9.1f} MB")
+    return results
+
+
+# Differences below these are noise, whatever the ratio
+MIN_DELTA = {'wall_seconds': 0.05, 'peak_rss_mb': 5.0}
+
+
+def compare(results, baseline, tolerance):
+    """Return regressions of more than `tolerance` against a baseline run"""
+    previous = {(r['benchmark'], r['rows']): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result['benchmark'], result['rows']))
+        if before is None:
+            continue
+        for metric in ('wall_seconds', 'peak_rss_mb'):
+            delta = result[metric] - before[metric]
+            if delta > before[metric] * tolerance and delta > MIN_DELTA[metric]:
+                regressions.append(f"{result['benchmark']} @ {result['rows']:,} rows: {metric} "
+                                   f"{before[metric]:.3f} -> {result[metric]:.3f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='1000,10000,100000')
+    parser.add_argument('--only', default=','.join(BENCHMARKS), help='Comma-separated benchmark names')
+    parser.add_argument('--output', help='Write results as JSON')
+    parser.add_argument('--baseline', help='JSON results from an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--child', nargs=2, metavar=('BENCHMARK', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    print(f"{'benchmark':28} {'rows':>10} {'wall':>12} {'peak RSS':>12}")
+    results = run_suite([int(r) for r in args.rows.split(',')], args.only.split(','))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"⚠️  Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
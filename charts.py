@@ -0,0 +1,262 @@
+"""
+Column L Charts
+Pie and bar chart rendering (PNG or SVG) with a bounded cache keyed by
+(chart type, counts, size, dpi, format)
+
+Charts are drawn with the object-oriented Figure + Agg canvas API, which
+keeps no global pyplot state, so renders can run concurrently on a
+RenderPool of threads or processes. matplotlib itself is imported on the
+first render (or by warm_up), not when this module is imported.
+"""
+
+import base64
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import lru_cache
+from metrics import metrics
+
+LABELS = ['Enfra', 'SMS LD', 'Others']
+COLORS = ['#ff9999', '#66b3ff', '#99ff99']
+
+DEFAULT_FIGSIZE = (10, 8)
+DEFAULT_DPI = 150
+
+# Output formats and their media types
+CHART_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# SVG keeps text as <text> rather than glyph paths, with stable element ids,
+# so it stays small and byte-identical across renders (only the SVG backend reads these)
+SVG_RC = {'svg.fonttype': 'none', 'svg.hashsalt': 'rms-charts'}
+
+# Named (figsize, dpi) presets for ?preset=
+CHART_PRESETS = {
+    'thumbnail': ((4, 3.2), 72),
+    'default': (DEFAULT_FIGSIZE, DEFAULT_DPI),
+    'wallboard': ((16, 9), 200),
+}
+
+CHART_CACHE_SIZE = int(os.environ.get('CHART_CACHE_SIZE', 128))
+
+# Render pool configuration: 'thread' or 'process', and its worker count
+CHART_RENDER_POOL = os.environ.get('CHART_RENDER_POOL', 'thread')
+CHART_RENDER_WORKERS = int(os.environ.get('CHART_RENDER_WORKERS', os.cpu_count() or 1))
+
+
+def _draw_pie(ax, sizes):
+    if sum(sizes) == 0:
+        ax.text(0.5, 0.5, 'No Data', ha='center', va='center', fontsize=16, transform=ax.transAxes)
+        ax.set_axis_off()
+        return
+
+    explode = (0.1, 0.1, 0.05)
+    wedges, texts, autotexts = ax.pie(sizes, labels=LABELS, colors=COLORS,
+                                      autopct='%1.1f%%', startangle=90,
+                                      explode=explode, shadow=True,
+                                      textprops={'fontsize': 12, 'fontweight': 'bold'})
+
+    for w in wedges:
+        w.set_linewidth(3)
+        w.set_edgecolor('white')
+
+    ax.set_title('Column L Analysis - Enfra & SMS LD Distribution',
+                 fontsize=16, fontweight='bold', pad=20)
+
+
+def _draw_bar(ax, sizes):
+    bars = ax.bar(LABELS, sizes, color=COLORS, alpha=0.8, edgecolor='black', linewidth=2)
+    ax.set_title('Count Comparison', fontsize=16, fontweight='bold')
+    ax.set_ylabel('Count', fontsize=12)
+
+    # Add value labels on bars
+    for bar, size in zip(bars, sizes):
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + 0.5,
+                f'{size}', ha='center', va='bottom', fontweight='bold', fontsize=12)
+
+    ax.grid(True, alpha=0.3)
+    ax.set_ylim(0, max(sizes) * 1.1 if max(sizes) > 0 else 10)
+
+
+CHART_TYPES = {
+    'pie': _draw_pie,
+    'bar': _draw_bar,
+}
+
+
+@lru_cache(maxsize=None)
+def _matplotlib():
+    """Import and configure matplotlib once, on first use: (Figure, FigureCanvasAgg)"""
+    from matplotlib import rcParams
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    rcParams.update(SVG_RC)
+    return Figure, FigureCanvasAgg
+
+
+def _render_chart(chart_type, counts, figsize, dpi, fmt='png'):
+    """Draw a chart on a private Figure and return PNG or SVG bytes (safe in any thread or process)"""
+    Figure, FigureCanvasAgg = _matplotlib()
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    CHART_TYPES[chart_type](ax, list(counts))
+
+    buf = io.BytesIO()
+    if fmt == 'svg':
+        fig.savefig(buf, format='svg', bbox_inches='tight', metadata={'Date': None})
+    else:
+        fig.savefig(buf, format='png', dpi=dpi, bbox_inches='tight')
+    return buf.getvalue()
+
+
+class RenderPool:
+    """Fixed-size pool of chart renderers backed by threads or processes"""
+
+    def __init__(self, workers=CHART_RENDER_WORKERS, kind=CHART_RENDER_POOL):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown render pool kind: {kind}")
+        self.workers = max(1, workers)
+        self.kind = kind
+        executor_class = ProcessPoolExecutor if kind == 'process' else ThreadPoolExecutor
+        self._executor = executor_class(max_workers=self.workers)
+
+    def submit(self, chart_type, counts, figsize=DEFAULT_FIGSIZE, dpi=DEFAULT_DPI, fmt='png'):
+        """Queue a render and return a Future resolving to PNG (or SVG) bytes"""
+        return self._executor.submit(_render_chart, chart_type, tuple(counts), tuple(figsize), dpi, fmt)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+class ChartCache:
+    """Bounded LRU cache of rendered chart bytes"""
+
+    def __init__(self, max_entries=CHART_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            png = self._entries.get(key)
+            if png is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return png
+
+    def put(self, key, png):
+        with self._lock:
+            self._entries[key] = png
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'entries': len(self._entries), 'max_entries': self.max_entries}
+
+
+chart_cache = ChartCache()
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    """Return the process-wide render pool, creating it on first use"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = RenderPool()
+        return _render_pool
+
+
+def _cache_key(chart_type, counts, figsize, dpi, fmt='png'):
+    return (chart_type, tuple(counts), (float(figsize[0]), float(figsize[1])), int(dpi), fmt)
+
+
+def render_chart_pngs(specs):
+    """Render several (chart_type, counts, figsize, dpi[, fmt]) specs concurrently; cached ones are reused"""
+    pngs = [None] * len(specs)
+    pending = {}
+    for i, spec in enumerate(specs):
+        key = _cache_key(*spec)
+        pngs[i] = chart_cache.get(key)
+        if pngs[i] is None:
+            pending[i] = (key, get_render_pool().submit(*spec))
+
+    for i, (key, future) in pending.items():
+        pngs[i] = future.result()
+        chart_cache.put(key, pngs[i])
+    return pngs
+
+
+def render_chart_png(chart_type, counts, figsize=DEFAULT_FIGSIZE, dpi=DEFAULT_DPI):
+    """Render a chart to PNG bytes; identical arguments are served from cache"""
+    return render_chart_pngs([(chart_type, counts, figsize, dpi)])[0]
+
+
+def render_chart(chart_type, counts, figsize=DEFAULT_FIGSIZE, dpi=DEFAULT_DPI, fmt='png'):
+    """Render a chart as PNG or SVG bytes, cached like render_chart_png"""
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Unknown chart format: {fmt}")
+    return render_chart_pngs([(chart_type, counts, figsize, dpi, fmt)])[0]
+
+
+def chart_etag(chart_type, counts, figsize=DEFAULT_FIGSIZE, dpi=DEFAULT_DPI, fmt='png'):
+    """Stable ETag for a chart, computed from its inputs without rendering"""
+    key = repr(_cache_key(chart_type, counts, figsize, dpi, fmt))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def chart_cache_stats():
+    """Report render cache counters"""
+    return chart_cache.stats()
+
+
+def create_chart_images(counts, chart_types=tuple(CHART_TYPES)):
+    """Render several chart types for the same counts in parallel, as base64 strings"""
+    with metrics.stage('render'):
+        pngs = render_chart_pngs([(chart_type, counts, DEFAULT_FIGSIZE, DEFAULT_DPI) for chart_type in chart_types])
+    with metrics.stage('base64'):
+        return {chart_type: base64.b64encode(png).decode('utf-8') for chart_type, png in zip(chart_types, pngs)}
+
+
+def create_pie_chart(enfra_count, sms_ld_count, other_count):
+    """Create a pie chart and return as base64 encoded image"""
+    png = render_chart_png('pie', (enfra_count, sms_ld_count, other_count))
+    return base64.b64encode(png).decode('utf-8')
+
+
+def create_bar_chart(enfra_count, sms_ld_count, other_count):
+    """Create a bar chart and return as base64 encoded image"""
+    png = render_chart_png('bar', (enfra_count, sms_ld_count, other_count))
+    return base64.b64encode(png).decode('utf-8')
+
+
+def warm_up(chart_types=tuple(CHART_TYPES)):
+    """Import matplotlib, build its font cache and draw every chart type once
+
+    The renders go through the pool, so its worker threads (or processes)
+    are started and warm as well. Returns the seconds spent.
+    """
+    start = time.perf_counter()
+    from matplotlib import font_manager
+    font_manager.findfont('DejaVu Sans')
+    render_chart_pngs([(chart_type, (1, 1, 1), CHART_PRESETS['thumbnail'][0], CHART_PRESETS['thumbnail'][1], fmt)
+                       for chart_type in chart_types for fmt in CHART_FORMATS])
+    return time.perf_counter() - start
@@ -1,22 +1,28 @@
-import pandas as pd
+from data_loader import read_sheet, column_names
+from aging import bucket_counts
 
-# Read the Excel file
-df = pd.read_excel("DB.xlsx")
-
-# Get column names
+# Get column names without reading the data rows
+columns = column_names("DB.xlsx")
 print("Column names:")
-for i, col in enumerate(df.columns):
+for i, col in enumerate(columns):
     print(f"{i}: {col}")
 
 print("\n" + "="*50)
 
 # Check if column I exists (index 8)
-if len(df.columns) > 8:
-    col_i_name = df.columns[8]
-    print(f"\nColumn I (index 8): {col_i_name}")
+if len(columns) > 8:
+    # Read only column I (columnar snapshot when fresh)
+    col_i = read_sheet("DB.xlsx", columns=["I"]).iloc[:, 0]
+    print(f"\nColumn I (index 8): {col_i.name}")
     print(f"\nUnique values in Column I:")
-    print(df.iloc[:, 8].value_counts())
+    print(col_i.value_counts())
     print(f"\nSample data:")
-    print(df.iloc[:, 8].head(20))
+    print(col_i.head(20))
+
+    # Column I is only as fresh as the last export; recompute from Offline Date
+    print(f"\nAging recomputed from Offline Date (as of now):")
+    df = read_sheet("DB.xlsx", columns=["Offline Date", "Cluster"])
+    for bucket, count in bucket_counts(df, by=None).items():
+        print(f"{bucket:15} {count}")
 else:
     print("Column I not found!")
@@ -0,0 +1,73 @@
+"""
+Column L Parity Check
+Counts Column L with the original row-by-row loop and with the factorized
+classifier (count_column_l) and checks that they agree on hand-made edge
+cases and on Column L of the source workbooks.
+
+    python check_column_l.py [workbook.xlsx ...]      # exit status 1 on any mismatch
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+from column_l import count_column_l, find_column_l
+from data_loader import SOURCE_WORKBOOKS, read_sheet
+
+EDGE_CASES = {
+    'mixed types': pd.Series(['Enfra', 12, 3.5, True, 'SMS LD', None, b'ENFRA', pd.Timestamp('2024-01-01')],
+                             dtype=object),
+    'missing values': pd.Series([np.nan, None, pd.NaT, 'Others', np.nan, 'enfra'], dtype=object),
+    'all missing': pd.Series([np.nan] * 4),
+    'empty': pd.Series([], dtype=object),
+    'spelling and whitespace': pd.Series(['SMS-LD', ' sms ld ', 'SMS  LD', 'SMSLD', '\tEnfra\n', 'ENFRA/SMS LD',
+                                          'Non-Enfra', 'sms-ld ', '', ' '] * 3),
+    'numbers': pd.Series([1.0, 2.0, np.nan, 1.0]),
+    'categorical': pd.Series(['Enfra', 'SMS-LD', None, 'Others', 'Enfra', ' enfra '], dtype='category'),
+    'categorical, unused categories': pd.Series(pd.Categorical(['Others', None, 'Others'],
+                                                               categories=['Enfra', 'SMS LD', 'Others'])),
+}
+
+
+def legacy_counts(column_l_data):
+    """The row loop app.py and column_l_analysis.py ran before column_l.py"""
+    enfra_count = 0
+    sms_ld_count = 0
+    other_count = 0
+
+    for value in column_l_data:
+        if pd.isna(value):
+            other_count += 1
+        else:
+            value_str = str(value).strip().upper()
+            if 'ENFRA' in value_str:
+                enfra_count += 1
+            elif 'SMS LD' in value_str or 'SMS-LD' in value_str:
+                sms_ld_count += 1
+            else:
+                other_count += 1
+
+    return {'enfra_count': enfra_count, 'sms_ld_count': sms_ld_count, 'other_count': other_count}
+
+
+def check(label, series):
+    expected, actual = legacy_counts(series), count_column_l(series)
+    print(f"{'✅' if expected == actual else '❌'} {label}: {actual}")
+    if expected != actual:
+        print(f"   row loop: {expected}")
+    return expected == actual
+
+
+def main(paths):
+    ok = all([check(label, series) for label, series in EDGE_CASES.items()])
+    for path in paths:
+        if os.path.exists(path):
+            series, name = find_column_l(read_sheet(path))
+            if series is not None:
+                ok &= check(f"{path} [{name}]", series)
+                ok &= check(f"{path} [{name}] as categorical", series.astype('category'))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:] or SOURCE_WORKBOOKS))
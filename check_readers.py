@@ -0,0 +1,81 @@
+"""
+Reader Parity Check
+Reads every sheet of the source workbooks, and a generated workbook with
+repeated and blank headers, whole-number, mixed, boolean and date columns,
+with the calamine reader and with pd.read_excel (openpyxl) and checks that
+column names, dtypes and values match, including projected reads.
+
+    python check_readers.py [workbook.xlsx ...]      # exit status 1 on any mismatch
+"""
+
+import datetime
+import os
+import sys
+import tempfile
+import pandas as pd
+from data_loader import SOURCE_WORKBOOKS, CalamineWorkbook, _read_calamine
+
+
+def compare(path):
+    """Mismatch descriptions for every sheet of one workbook"""
+    problems = []
+    with pd.ExcelFile(path) as xls:
+        for sheet in xls.sheet_names:
+            expected = xls.parse(sheet)
+            actual = _read_calamine(path, sheet)
+            dtypes = {str(col): (str(expected[col].dtype), str(actual[col].dtype))
+                      for col in expected.columns if col in actual.columns and expected[col].dtype != actual[col].dtype}
+            if dtypes:
+                problems.append(f"{path} [{sheet}] dtypes (read_excel, calamine): {dtypes}")
+            try:
+                pd.testing.assert_frame_equal(actual, expected)
+            except AssertionError as e:
+                problems.append(f"{path} [{sheet}] values: {e}")
+
+            # Projection: last column first, like read_sheet(columns=[...])
+            positions = [len(expected.columns) - 1, 0] if len(expected.columns) > 1 else []
+            if positions:
+                projected = _read_calamine(path, sheet, positions)
+                try:
+                    pd.testing.assert_frame_equal(projected, expected.iloc[:, positions])
+                except AssertionError as e:
+                    problems.append(f"{path} [{sheet}] projected read: {e}")
+    return problems
+
+
+def edge_case_workbook(path):
+    """Repeated / blank / numeric headers and the cell types the readers convert differently"""
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['Status', 'Status', None, 'Count', 'Mixed', 'Flag', 'Gaps', 2024, 'Status.1', 'Date', 'Status'])
+    ws.append(['Open', 'a', 1, 1, 1, True, 1, 5, 'x', datetime.datetime(2024, 1, 2), 'p'])
+    ws.append(['Closed', 'b', 2, 2, 2.5, False, None, 6, 'y', datetime.datetime(2024, 1, 3, 5, 30), 'q'])
+    ws.append(['Open', 'b', 3, 3, 3, True, 3, 7.5, 'z', None, 'r'])
+    wb.save(path)
+    return path
+
+
+def main(paths):
+    if CalamineWorkbook is None:
+        print("python-calamine is not installed; nothing to compare")
+        return 0
+    problems = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = edge_case_workbook(os.path.join(tmp, 'edge_cases.xlsx'))
+        found = compare(path)
+        print(f"{'✅' if not found else '❌'} repeated headers, whole numbers, dates")
+        problems += found
+    for path in paths:
+        if os.path.exists(path):
+            found = compare(path)
+            print(f"{'✅' if not found else '❌'} {path}")
+            problems += found
+    for problem in problems:
+        print(f"⚠️  {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:] or SOURCE_WORKBOOKS))
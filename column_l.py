@@ -0,0 +1,74 @@
+"""
+Column L Classifier
+Shared Enfra / SMS LD / Others classification for Column L (Domain)
+"""
+
+import numpy as np
+import pandas as pd
+
+CATEGORIES = ['Enfra', 'SMS LD', 'Others']
+ENFRA, SMS_LD, OTHERS = range(3)
+
+
+def column_l_position(columns):
+    """Return the 0-based position of column L in a header row, or None"""
+    if 'L' in columns:
+        return columns.index('L')
+    if len(columns) > 11:  # Column L would be index 11 (0-based)
+        return 11
+    return None
+
+
+def column_l_projection(columns):
+    """Projection for data_loader reads that keeps only column L"""
+    position = column_l_position(columns)
+    return [] if position is None else [position]
+
+
+def find_column_l(df):
+    """Return (series, column name) for column L, or (None, None) when missing"""
+    columns = df.columns.tolist()
+    position = column_l_position(columns)
+    if position is None:
+        return None, None
+    return df.iloc[:, position], columns[position]
+
+
+def classify_value(value):
+    """Classify a single cell; NaN and unmatched text fall into Others"""
+    if pd.isna(value):
+        return OTHERS
+    value_str = str(value).strip().upper()
+    if 'ENFRA' in value_str:
+        return ENFRA
+    if 'SMS LD' in value_str or 'SMS-LD' in value_str:
+        return SMS_LD
+    return OTHERS
+
+
+def classify_codes(series):
+    """Return an int8 array of category codes (ENFRA, SMS_LD, OTHERS) per row
+
+    Only the distinct values are classified; rows are mapped back through
+    their factorized (or categorical) codes, so cost scales with cardinality.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        uniques = series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+
+    # Slot len(uniques) holds missing values (code -1 wraps to the last slot)
+    lookup = np.fromiter((classify_value(v) for v in uniques), dtype=np.int8, count=len(uniques))
+    lookup = np.append(lookup, np.int8(OTHERS))
+    return lookup[codes]
+
+
+def count_column_l(series):
+    """Count Enfra, SMS LD and Others rows in a column"""
+    counts = np.bincount(classify_codes(series), minlength=len(CATEGORIES))
+    return {
+        'enfra_count': int(counts[ENFRA]),
+        'sms_ld_count': int(counts[SMS_LD]),
+        'other_count': int(counts[OTHERS])
+    }
@@ -3,9 +3,8 @@ Column L Analysis with 3D Pie Chart
 Counts 'Enfra' and 'SMS LD' occurrences in column L and displays them in a 3D pie chart
 """
 
-import pandas as pd
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
+from data_loader import read_sheet, column_names, last_load_stats
+from column_l import column_l_projection, count_column_l
 import numpy as np
 import warnings
 warnings.filterwarnings('ignore')
@@ -17,47 +16,30 @@ def index():
         print("📊 Analyzing Column L for Enfra & SMS LD")
         print("=" * 45)
         
-        # Read Excel file
-        df = pd.read_excel('DB.xlsx')
-        print(f"✅ Successfully loaded Excel file with {len(df)} rows")
-        
         # Check if column L exists
-        columns = df.columns.tolist()
+        columns = column_names('DB.xlsx')
         print(f"Available columns: {columns}")
         
-        # Find column L (could be index 11 or named 'L')
-        column_l_data = None
-        column_l_name = None
+        # Read only column L (could be index 11 or named 'L')
+        df = read_sheet('DB.xlsx', columns=column_l_projection)
+        stats = last_load_stats()
+        print(f"✅ Successfully loaded Excel file with {len(df)} rows "
+              f"({stats['parse_seconds'] * 1000:.1f} ms, {stats['memory_saved_bytes'] / 1024:.1f} KB saved by projection)")
         
-        if 'L' in columns:
-            column_l_data = df['L']
-            column_l_name = 'L'
-        elif len(columns) > 11:  # Column L would be index 11 (0-based)
-            column_l_data = df.iloc[:, 11]
-            column_l_name = columns[11]
-        else:
+        if df.columns.empty:
             print("❌ Column L not found in the dataset")
             return
+        column_l_data = df.iloc[:, 0]
+        column_l_name = df.columns[0]
         
         print(f"\n📋 Analyzing column: {column_l_name}")
         print(f"Total values in column: {len(column_l_data)}")
         
         # Count occurrences
-        enfra_count = 0
-        sms_ld_count = 0
-        other_count = 0
-        
-        for value in column_l_data:
-            if pd.isna(value):
-                other_count += 1
-            else:
-                value_str = str(value).strip().upper()
-                if 'ENFRA' in value_str:
-                    enfra_count += 1
-                elif 'SMS LD' in value_str or 'SMS-LD' in value_str:
-                    sms_ld_count += 1
-                else:
-                    other_count += 1
+        counts = count_column_l(column_l_data)
+        enfra_count = counts['enfra_count']
+        sms_ld_count = counts['sms_ld_count']
+        other_count = counts['other_count']
         
         print(f"\n📈 COUNT RESULTS:")
         print(f"Enfra: {enfra_count}")
@@ -80,6 +62,8 @@ def index():
 
 def create_3d_pie_chart(enfra_count, sms_ld_count, other_count):
     """Create a 3D pie chart for the counts"""
+    # Imported on first chart so the counting path starts without matplotlib
+    import matplotlib.pyplot as plt
     
     # Data for pie chart
     labels = ['Enfra', 'SMS LD', 'Others']
@@ -131,6 +115,8 @@ def create_3d_pie_chart(enfra_count, sms_ld_count, other_count):
 
 def create_enhanced_3d_visualization(enfra_count, sms_ld_count, other_count):
     """Create an enhanced 3D visualization"""
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.mplot3d import Axes3D  # noqa: F401 -- registers the '3d' projection
     
     fig = plt.figure(figsize=(15, 10))
     
@@ -0,0 +1,280 @@
+"""
+Compact Sheet Representation
+Shrinks a loaded sheet for long-lived processes (the data service, the
+dashboard):
+
+- Site Ids (ES2-SUK-01527, EUS-LRK-00042) are parsed into a prefix code,
+  a cluster code and an integer, 8 bytes per row instead of a Python string;
+  the odd cell that does not follow the pattern is kept verbatim
+- the known low-cardinality columns (Sub Region, Cluster, Team lead, ES
+  POC, Device Brand, Aging, Domain) become categorical, each distinct value
+  stored once
+- other text (History, Reason, remarks) is interned, so equal cells share
+  one object while the column stays a plain object column
+
+The Site Id column reads like strings: comparisons, isin, astype(str),
+groupby, merges and row hashes see the original text, and Arrow snapshots
+store it as a plain string column. It is read-only, though: no item
+assignment, no .str accessor and no min / max; convert with astype(str)
+first. The data service only compacts with RMS_COMPACT=1.
+
+    python compact.py DB.xlsx events.xlsx      # memory before / after per sheet
+"""
+
+import re
+import sys
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import ExtensionArray, ExtensionDtype, register_extension_dtype, take
+
+SITE_ID_COLUMNS = ['Site Id', 'ENF Site ID']
+# Low-cardinality columns held as categoricals; all other text is interned
+CATEGORY_COLUMNS = ['Sub Region', 'Cluster', 'Region', 'Team lead', 'ES POC', 'SMS POC',
+                    'Device Brand', 'Aging', 'Domain']
+
+_SITE_ID = re.compile(r'^([A-Z0-9]+)-([A-Z]+)-(\d+)$')
+
+
+@register_extension_dtype
+class SiteIdDtype(ExtensionDtype):
+    """Dtype of a parsed Site Id column"""
+
+    name = 'site_id'
+    type = str
+    kind = 'O'
+    na_value = np.nan
+
+    @classmethod
+    def construct_array_type(cls):
+        return SiteIdArray
+
+
+class SiteIdArray(ExtensionArray):
+    """Site Ids stored as (prefix code, cluster code, number, digit count) per row
+
+    prefix code -1 marks a blank cell and -2 a value outside the pattern
+    (stray spaces, typos), kept verbatim in `irregular` at index `number`.
+    The digit count keeps zero padding, so ES2-SUK-01527 round-trips exactly.
+    """
+
+    def __init__(self, prefix, cluster, number, width, prefixes, clusters, irregular=()):
+        self._prefix = prefix
+        self._cluster = cluster
+        self._number = number
+        self._width = width
+        self.prefixes = prefixes
+        self.clusters = clusters
+        self.irregular = list(irregular)
+
+    @classmethod
+    def parse(cls, values, max_irregular=0.01):
+        """SiteIdArray from strings; None when more than max_irregular of the values are not Site Ids"""
+        values = pd.Series(values, dtype=object)
+        blank = values.isna().to_numpy()
+        text = values[~blank]
+        parts = text.astype(str).str.extract(_SITE_ID)
+        odd = parts[0].isna().to_numpy() | ~text.map(type).eq(str).to_numpy()
+        odd |= parts[2].str.len().fillna(0).to_numpy() > 9
+        if odd.sum() > len(text) * max_irregular:
+            return None
+        regular = parts[~odd]
+        prefix_codes, prefixes = pd.factorize(regular[0], sort=True)
+        cluster_codes, clusters = pd.factorize(regular[1], sort=True)
+        if len(prefixes) > 127 or len(clusters) > 32767:
+            return None
+        irregular, irregular_codes = pd.factorize(text[odd])[::-1]
+
+        n = len(values)
+        prefix = np.full(n, -1, dtype=np.int8)
+        cluster = np.zeros(n, dtype=np.int16)
+        number = np.zeros(n, dtype=np.int32)
+        width = np.zeros(n, dtype=np.int8)
+        rows = np.flatnonzero(~blank)
+        prefix[rows[~odd]] = prefix_codes
+        cluster[rows[~odd]] = cluster_codes
+        number[rows[~odd]] = regular[2].astype(np.int64).to_numpy()
+        width[rows[~odd]] = regular[2].str.len().to_numpy()
+        prefix[rows[odd]] = -2
+        number[rows[odd]] = irregular_codes
+        return cls(prefix, cluster, number, width, list(prefixes), list(clusters), list(irregular))
+
+    # -- ExtensionArray interface ---------------------------------------------------------
+
+    @classmethod
+    def _from_sequence(cls, scalars, *, dtype=None, copy=False):
+        array = cls.parse(np.asarray(scalars, dtype=object), max_irregular=1)
+        if array is None:
+            raise ValueError("Too many distinct Site Id prefixes or clusters to encode")
+        return array
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        return cls._from_sequence(values)
+
+    @property
+    def dtype(self):
+        return SiteIdDtype()
+
+    @property
+    def nbytes(self):
+        return (self._prefix.nbytes + self._cluster.nbytes + self._number.nbytes + self._width.nbytes
+                + sum(sys.getsizeof(label) for label in self.prefixes + self.clusters + self.irregular))
+
+    def __len__(self):
+        return len(self._prefix)
+
+    def _fields(self):
+        return self._prefix, self._cluster, self._number, self._width
+
+    def _with(self, fields):
+        return type(self)(*fields, self.prefixes, self.clusters, self.irregular)
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return self._format(int(item))
+        item = pd.api.indexers.check_array_indexer(self, item)
+        return self._with([field[item] for field in self._fields()])
+
+    def _format(self, i):
+        if self._prefix[i] < 0:
+            return np.nan if self._prefix[i] == -1 else self.irregular[self._number[i]]
+        return f"{self.prefixes[self._prefix[i]]}-{self.clusters[self._cluster[i]]}-{self._number[i]:0{self._width[i]}d}"
+
+    def _strings(self):
+        prefixes, clusters, irregular = self.prefixes, self.clusters, self.irregular
+        return [f"{prefixes[p]}-{clusters[c]}-{n:0{w}d}" if p >= 0 else (np.nan if p == -1 else irregular[n])
+                for p, c, n, w in zip(*(field.tolist() for field in self._fields()))]
+
+    def __array__(self, dtype=None):
+        strings = np.array(self._strings(), dtype=object)
+        return strings if dtype is None else strings.astype(dtype)
+
+    def __iter__(self):
+        return iter(self._strings())
+
+    def _matches(self, site_id):
+        """Rows equal to one Site Id, compared on the parsed fields"""
+        mask = np.zeros(len(self), dtype=bool)
+        parts = _SITE_ID.match(site_id)
+        if parts and parts[1] in self.prefixes and parts[2] in self.clusters:
+            mask = ((self._prefix == self.prefixes.index(parts[1])) & (self._cluster == self.clusters.index(parts[2]))
+                    & (self._number == int(parts[3])) & (self._width == len(parts[3])))
+        elif site_id in self.irregular:
+            mask = (self._prefix == -2) & (self._number == self.irregular.index(site_id))
+        return mask
+
+    def __eq__(self, other):
+        if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+            return NotImplemented
+        if isinstance(other, str):
+            return self._matches(other)
+        return np.asarray(self) == (np.asarray(other, dtype=object) if pd.api.types.is_list_like(other) else other)
+
+    def isna(self):
+        return self._prefix == -1
+
+    def take(self, indices, allow_fill=False, fill_value=None):
+        if allow_fill and fill_value is not None and not pd.isna(fill_value):
+            # Filling with a real Site Id needs it parsed; go through strings
+            return self._from_sequence(take(np.asarray(self), indices, allow_fill=True, fill_value=fill_value))
+        fields = [take(field, indices, allow_fill=allow_fill, fill_value=fill)
+                  for field, fill in zip(self._fields(), (-1, 0, 0, 0))]
+        return self._with(fields)
+
+    def copy(self):
+        return self._with([field.copy() for field in self._fields()])
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        to_concat = list(to_concat)
+        first = to_concat[0]
+        if all((array.prefixes, array.clusters, array.irregular) == (first.prefixes, first.clusters, first.irregular)
+               for array in to_concat):
+            return first._with([np.concatenate(fields) for fields in zip(*(array._fields() for array in to_concat))])
+        return cls._from_sequence(np.concatenate([np.asarray(array) for array in to_concat]))
+
+    def _values_for_factorize(self):
+        # Factorize, groupby, merges and row hashes work on the original text
+        return np.asarray(self), np.nan
+
+    def value_counts(self, dropna=True):
+        return pd.Series(np.asarray(self), dtype=object).value_counts(dropna=dropna)
+
+    def _values_for_argsort(self):
+        return np.asarray(self)
+
+    def __arrow_array__(self, type=None):
+        import pyarrow as pa
+        return pa.array(np.asarray(self), type=type or pa.string(), from_pandas=True)
+
+    # -- Parsed parts -----------------------------------------------------------------------
+
+    def cluster_codes(self):
+        """Cluster code per row (SUK in ES2-SUK-01527) as a categorical; blank for irregular values"""
+        codes = np.where(self._prefix < 0, -1, self._cluster)
+        return pd.Categorical.from_codes(codes, categories=self.clusters)
+
+    def numbers(self):
+        """Integer part per row; -1 for blanks and irregular values"""
+        return np.where(self._prefix < 0, -1, self._number)
+
+
+def _intern(series):
+    """Equal strings share one object (factorize keeps the first occurrence of each)"""
+    codes, uniques = pd.factorize(series)
+    values = np.asarray(uniques, dtype=object).take(codes)
+    values[codes < 0] = np.nan
+    return pd.Series(values, index=series.index, name=series.name, dtype=object)
+
+
+def compact_frame(df):
+    """Compact copy of a sheet: parsed Site Ids, categorical and interned text"""
+    out = {}
+    for col in df.columns:
+        series = df[col]
+        if series.dtype != object:
+            out[col] = series
+            continue
+        if col in SITE_ID_COLUMNS:
+            parsed = SiteIdArray.parse(series)
+            if parsed is not None:
+                out[col] = pd.Series(parsed, index=series.index, name=col)
+                continue
+        if col in CATEGORY_COLUMNS:
+            out[col] = series.astype('category')
+        else:
+            out[col] = _intern(series)
+    return pd.DataFrame(out, index=df.index)
+
+
+def memory_bytes(df):
+    """Memory of a sheet, counting each distinct Python object once
+
+    memory_usage(deep=True) sizes every cell of an object column on its
+    own, so it does not see interned strings; this counts shared objects
+    once, like the process heap does.
+    """
+    total = int(df.index.memory_usage(deep=True))
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object:
+            values = series.to_numpy()
+            seen = {id(value): value for value in values}
+            total += values.nbytes + sum(sys.getsizeof(value) for value in seen.values())
+        else:
+            total += int(series.memory_usage(index=False, deep=True))
+    return total
+
+
+def main(paths):
+    from data_loader import read_sheet, promote_header
+
+    print(f"{'sheet':28} {'rows':>8} {'before':>10} {'after':>10} {'saved':>6}")
+    for path in paths:
+        df = promote_header(read_sheet(path))
+        before, after = memory_bytes(df), memory_bytes(compact_frame(df))
+        print(f"{path:28} {len(df):>8,} {before / 1e6:>8.2f}MB {after / 1e6:>8.2f}MB {1 - after / max(before, 1):>6.0%}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or ['DB.xlsx'])
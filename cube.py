@@ -0,0 +1,101 @@
+"""
+Offline Site Aggregate Cube
+Dense NumPy count cube over categorical codes, built once per workbook
+version so any roll-up or filter is answered without touching the rows.
+"""
+
+from math import prod
+import numpy as np
+import pandas as pd
+from column_l import classify_codes, CATEGORIES
+
+# Dimensions taken from the DB.xlsx headers, in cube axis order
+DIMENSIONS = ['Sub Region', 'Cluster', 'Aging', 'Domain', 'Device Brand', 'Team lead']
+
+BLANK_LABEL = '(blank)'
+# DB.xlsx today: 15 sub regions x 3 clusters x 5 aging x 3 domains x 3 brands x 3 team leads = 6,075 cells.
+# 4M cells (16 MB of int32 counts per warm dataset) leaves over 600x that for growth;
+# a larger cube is not built and only /cube is unavailable for the dataset
+MAX_CELLS = 4_000_000
+
+
+def _encode(series):
+    """Return (codes, labels) for a dimension; blanks get their own label"""
+    if series.name == 'Domain':
+        # Domain rolls up to Enfra / SMS LD / Others like Column L
+        return classify_codes(series).astype(np.intp), list(CATEGORIES)
+
+    codes, uniques = pd.factorize(series.astype(object), sort=True)
+    labels = [str(value) for value in uniques]
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(labels), codes)
+        labels.append(BLANK_LABEL)
+    return codes.astype(np.intp), labels
+
+
+class AggregateCube:
+    """Counts of rows for every combination of the dimension values"""
+
+    def __init__(self, df, dimensions=DIMENSIONS):
+        self.dimensions = [dim for dim in dimensions if dim in df.columns]
+        if not self.dimensions:
+            raise ValueError("None of the cube dimensions are present in the sheet")
+
+        encoded = [_encode(df[dim]) for dim in self.dimensions]
+        self.labels = {dim: labels for dim, (_, labels) in zip(self.dimensions, encoded)}
+        self._positions = {dim: {label: i for i, label in enumerate(labels)}
+                           for dim, labels in self.labels.items()}
+
+        shape = tuple(len(labels) for _, labels in encoded)
+        if prod(shape) > MAX_CELLS:
+            raise ValueError(f"Cube of shape {shape} exceeds {MAX_CELLS} cells")
+
+        flat = np.ravel_multi_index([codes for codes, _ in encoded], shape)
+        self.counts = np.bincount(flat, minlength=prod(shape)).astype(np.int32).reshape(shape)
+        self.total = len(df)
+
+    def _codes(self, dim, values):
+        if isinstance(values, str) or not hasattr(values, '__iter__'):
+            values = [values]
+        positions = self._positions[dim]
+        return np.array([positions[v] for v in dict.fromkeys(values) if v in positions], dtype=np.intp)
+
+    def query(self, by=(), filters=None):
+        """Count rows grouped by `by`, restricted to `filters` ({dimension: value or list})
+
+        Returns an int when `by` is empty, {label: count} for one dimension
+        and {(label, ...): count} for several. Zero cells are omitted.
+        """
+        filters = filters or {}
+        unknown = [dim for dim in list(by) + list(filters) if dim not in self.labels]
+        if unknown:
+            raise KeyError(f"Unknown cube dimensions: {unknown}")
+        repeated = [dim for dim in dict.fromkeys(by) if list(by).count(dim) > 1]
+        if repeated:
+            raise ValueError(f"Cube dimensions repeated in by: {repeated}")
+
+        cube = self.counts
+        for axis, dim in enumerate(self.dimensions):
+            if dim in filters:
+                cube = cube.take(self._codes(dim, filters[dim]), axis=axis)
+
+        keep = [self.dimensions.index(dim) for dim in by]
+        drop = tuple(axis for axis in range(cube.ndim) if axis not in keep)
+        rolled = cube.sum(axis=drop)
+        if not by:
+            return int(rolled)
+
+        # Remaining axes are in cube order; reorder them to match `by`
+        rolled = rolled.transpose(np.argsort(np.argsort(keep)))
+        axis_labels = []
+        for dim in by:
+            labels = self.labels[dim]
+            if dim in filters:
+                labels = [labels[i] for i in self._codes(dim, filters[dim])]
+            axis_labels.append(labels)
+
+        result = {}
+        for index in zip(*np.nonzero(rolled)):
+            key = tuple(axis_labels[axis][i] for axis, i in enumerate(index))
+            result[key[0] if len(by) == 1 else key] = int(rolled[index])
+        return result
@@ -0,0 +1,524 @@
+"""
+Workbook Loader
+Reads RMS workbooks through typed columnar snapshots (Arrow IPC / Feather),
+falling back to the xlsx source when no fresh snapshot exists.
+
+Reads accept a column projection (header names or Excel letters) that is
+pushed down to the snapshot, calamine or openpyxl reader, so only the
+needed columns are materialized. Timing and memory figures for the last
+call on the current thread are available from last_load_stats().
+
+Multi-sheet reads open each workbook once (read_workbook), optionally
+split across worker processes, and LazyWorkbook parses a sheet only when
+it is first accessed.
+
+With compact=True a sheet is returned in the compact representation
+(parsed Site Ids, categorical and interned text; see compact.py) for
+processes that keep it in memory.
+
+Run directly to ingest every source workbook:
+    python data_loader.py [workbook.xlsx ...]
+"""
+
+import datetime
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from compact import compact_frame
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # Snapshots are an optimisation; xlsx always works
+    pa = None
+    feather = None
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # Optional Rust-based xlsx reader
+    CalamineWorkbook = None
+
+SNAPSHOT_DIR = '.snapshots'
+MANIFEST_NAME = 'manifest.json'
+
+SOURCE_WORKBOOKS = [
+    'DB.xlsx',
+    'SPD.xlsx',
+    'Rectifier.xlsx',
+    'Rectifier Fan.xlsx',
+    'DSE.xlsx',
+    'events.xlsx',
+    'tenant.xlsx',
+    'Locations.xlsx',
+]
+
+# Low-cardinality columns stored as categoricals
+CATEGORICAL_COLUMNS = ['Sub Region', 'Cluster', 'Region', 'Aging', 'Domain']
+
+# Columns parsed to datetime64 during ingest
+DATETIME_COLUMNS = ['Offline Date', 'Beginning']
+
+_EXCEL_LETTERS = re.compile(r'[A-Z]{1,3}')
+_stats = threading.local()
+
+
+def snapshot_dir(xlsx_path):
+    """Return the snapshot directory for a workbook (next to the source file)"""
+    xlsx_path = os.path.abspath(xlsx_path)
+    return os.path.join(os.path.dirname(xlsx_path), SNAPSHOT_DIR, os.path.basename(xlsx_path))
+
+
+def _source_signature(xlsx_path):
+    stat = os.stat(xlsx_path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def read_manifest(xlsx_path):
+    """Return the snapshot manifest if it matches the current source file, else None"""
+    if feather is None:
+        return None
+    manifest_path = os.path.join(snapshot_dir(xlsx_path), MANIFEST_NAME)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('source') != _source_signature(xlsx_path):
+            return None
+        return manifest
+    except (OSError, ValueError):
+        return None
+
+
+def snapshot_is_fresh(xlsx_path):
+    """True when a snapshot exists for the current version of the workbook"""
+    return read_manifest(xlsx_path) is not None
+
+
+def normalize_types(df):
+    """Apply the ingest dtypes: categoricals and parsed datetimes"""
+    for col in DATETIME_COLUMNS:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def promote_header(df):
+    """Use the first row as the header when the real header sits below a blank row
+
+    tenant.xlsx and Locations.xlsx start with an empty row, so pandas names
+    every column 'Unnamed: N' and reads the header as data.
+    """
+    if len(df) and all(str(col).startswith('Unnamed:') for col in df.columns) and df.iloc[0].notna().all():
+        header = [str(value).strip() for value in df.iloc[0]]
+        df = df.iloc[1:].reset_index(drop=True)
+        df.columns = header
+        df = df.infer_objects()
+    return df
+
+
+def to_arrow(df):
+    """Convert a sheet to an Arrow table, stringifying mixed-type object columns"""
+    df = df.copy()
+    df.columns = [str(c) for c in df.columns]
+    for col in df.columns:
+        if df[col].dtype == object:
+            try:
+                pa.array(df[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def build_snapshot(xlsx_path):
+    """Convert every sheet of a workbook into typed Feather files and write a manifest"""
+    if feather is None:
+        raise RuntimeError("pyarrow is not installed; snapshots are unavailable")
+
+    out_dir = snapshot_dir(xlsx_path)
+    os.makedirs(out_dir, exist_ok=True)
+    source = _source_signature(xlsx_path)
+
+    sheets = []
+    for i, (sheet_name, df) in enumerate(pd.read_excel(xlsx_path, sheet_name=None).items()):
+        file_name = f"{i:02d}.arrow"
+        table = to_arrow(normalize_types(df))
+        # Uncompressed so reads can memory-map without a decode step. Written
+        # aside and renamed: frames still mapping the old file keep its inode.
+        tmp_path = os.path.join(out_dir, file_name + '.tmp')
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, os.path.join(out_dir, file_name))
+        sheets.append({'name': sheet_name, 'file': file_name, 'rows': len(df)})
+
+    manifest = {'source': source, 'sheets': sheets}
+    tmp_path = os.path.join(out_dir, MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(out_dir, MANIFEST_NAME))
+    return manifest
+
+
+def ensure_snapshot(xlsx_path):
+    """Build the snapshot if it is missing or stale; returns True when one is available"""
+    if feather is None or not os.path.exists(xlsx_path):
+        return False
+    if not snapshot_is_fresh(xlsx_path):
+        build_snapshot(xlsx_path)
+    return True
+
+
+def _find_sheet(manifest, sheet_name):
+    sheets = manifest['sheets']
+    if isinstance(sheet_name, int):
+        return sheets[sheet_name] if sheet_name < len(sheets) else None
+    for sheet in sheets:
+        if sheet['name'] == sheet_name:
+            return sheet
+    return None
+
+
+def sheet_names(xlsx_path):
+    """List sheet names, from the manifest when fresh"""
+    manifest = read_manifest(xlsx_path)
+    if manifest is not None:
+        return [sheet['name'] for sheet in manifest['sheets']]
+    return pd.ExcelFile(xlsx_path).sheet_names
+
+
+def _is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+def header_names(header):
+    """Name header cells the way pd.read_excel does
+
+    Blank cells become 'Unnamed: <position>' and repeated names get .1, .2
+    suffixes (skipping names already in the header), named columns first.
+    """
+    names = [f"Unnamed: {i}" if value is None else value for i, value in enumerate(header)]
+    unnamed = [i for i, value in enumerate(header) if value is None]
+    counts = {}
+    for i in [i for i in range(len(names)) if header[i] is not None] + unnamed:
+        name = original = names[i]
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[original] = count + 1
+            name = f"{original}.{count}"
+            count = count + 1 if name in names else counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+
+def _calamine_cell(value):
+    """A calamine cell as openpyxl reports it to pandas: '' -> NaN, 3.0 -> 3, dates -> datetimes"""
+    if value == '':
+        return np.nan
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if type(value) is datetime.date:  # Calamine returns midnight datetimes as dates
+        return datetime.datetime.combine(value, datetime.time())
+    return value
+
+
+def resolve_columns(names, columns):
+    """Map a projection onto 0-based positions in the header row
+
+    columns is a list of header names, Excel letters ('L') or positions, or
+    a callable mapping the header row to such a list. Header names win over
+    letters, so a column literally titled 'L' is still found by name.
+    """
+    wanted = columns(names) if callable(columns) else columns
+    positions = []
+    for column in wanted:
+        if isinstance(column, int):
+            position = column
+        elif column in names:
+            position = names.index(column)
+        elif isinstance(column, str) and _EXCEL_LETTERS.fullmatch(column):
+            from openpyxl.utils import column_index_from_string
+            position = column_index_from_string(column) - 1
+        else:
+            raise KeyError(f"Column {column!r} not found")
+        if position >= len(names):
+            raise KeyError(f"Column {column!r} is beyond the last column ({len(names)} columns)")
+        positions.append(position)
+    return positions
+
+
+def column_names(xlsx_path, sheet_name=0):
+    """Return a sheet's header row without parsing the data rows"""
+    manifest = read_manifest(xlsx_path) if _is_path(xlsx_path) else None
+    sheet = _find_sheet(manifest, sheet_name) if manifest is not None else None
+    if sheet is not None:
+        path = os.path.join(snapshot_dir(xlsx_path), sheet['file'])
+        return feather.read_table(path, memory_map=True).column_names
+
+    import openpyxl  # Only the xlsx fallback needs it; snapshot and calamine reads start faster
+    wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        names = header_names(next(ws.iter_rows(max_row=1, values_only=True), ()))
+    finally:
+        wb.close()
+        if not _is_path(xlsx_path):
+            xlsx_path.seek(0)
+    return names
+
+
+def _calamine_sheet(wb, sheet_name):
+    return wb.get_sheet_by_index(sheet_name) if isinstance(sheet_name, int) else wb.get_sheet_by_name(sheet_name)
+
+
+def _read_calamine(xlsx_path, sheet_name, positions=None, wb=None):
+    """Read the selected columns (all when positions is None) with the calamine (Rust) xlsx reader
+
+    Pass an open CalamineWorkbook as wb to read several sheets from one open.
+    """
+    wb = wb or CalamineWorkbook.from_path(os.fspath(xlsx_path))
+    rows = _calamine_sheet(wb, sheet_name).to_python(skip_empty_area=False)
+    names = header_names([None if value == '' else _calamine_cell(value) for value in rows[0]]) if rows else []
+    if positions is None:
+        positions = range(len(names))
+
+    # Trailing blank rows are dropped, matching pd.read_excel
+    body = rows[1:]
+    while body and all(value == '' for value in body[-1]):
+        body.pop()
+
+    # Cells converted as openpyxl would, then inferred per column, give read_excel's dtypes:
+    # int64 for whole numbers, float64 for blank-only and number-with-blank columns, datetime64 for dates.
+    # Columns are built by position so repeated positions and names cannot collapse
+    df = pd.DataFrame({i: pd.Series([_calamine_cell(row[pos]) if pos < len(row) else np.nan for row in body],
+                                    dtype=object)
+                       for i, pos in enumerate(positions)})
+    df.columns = [names[pos] for pos in positions]
+    return df.infer_objects()
+
+
+def read_sheet(xlsx_path, sheet_name=0, columns=None, dtype=None, compact=False):
+    """Read one sheet, from the memory-mapped snapshot when fresh, else from xlsx
+
+    columns projects the read (see resolve_columns); dtype maps column names
+    to dtypes applied to the result. compact=True promotes an offset header
+    and returns the compact representation. Parse time and memory figures
+    are recorded for last_load_stats().
+    """
+    start = time.perf_counter()
+    stats = {'source': 'xlsx', 'engine': 'openpyxl', 'memory_saved_estimated': False}
+
+    manifest = read_manifest(xlsx_path) if _is_path(xlsx_path) else None
+    sheet = _find_sheet(manifest, sheet_name) if manifest is not None else None
+    if sheet is not None:
+        path = os.path.join(snapshot_dir(xlsx_path), sheet['file'])
+        table = feather.read_table(path, memory_map=True)
+        columns_total = table.num_columns
+        if columns is not None:
+            full_bytes = table.nbytes
+            table = table.select(resolve_columns(table.column_names, columns))
+            stats['memory_saved_bytes'] = full_bytes - table.nbytes
+        df = table.to_pandas()
+        stats.update(source='snapshot', engine='arrow')
+    elif columns is None:
+        if CalamineWorkbook is not None and _is_path(xlsx_path):
+            df = _read_calamine(xlsx_path, sheet_name)
+            stats['engine'] = 'calamine'
+        else:
+            df = pd.read_excel(xlsx_path, sheet_name=sheet_name, dtype=dtype)
+        columns_total = len(df.columns)
+    else:
+        names = column_names(xlsx_path, sheet_name)
+        columns_total = len(names)
+        positions = resolve_columns(names, columns)
+        if not positions:
+            df = pd.DataFrame()
+        elif CalamineWorkbook is not None and _is_path(xlsx_path):
+            df = _read_calamine(xlsx_path, sheet_name, positions)
+            stats['engine'] = 'calamine'
+        else:
+            df = pd.read_excel(xlsx_path, sheet_name=sheet_name, usecols=positions, dtype=dtype)
+            # usecols returns columns in sheet order; restore the requested order
+            order = sorted(set(positions))
+            df = df.iloc[:, [order.index(pos) for pos in positions]]
+
+    if dtype:
+        df = df.astype({col: kind for col, kind in dtype.items() if col in df.columns})
+    if compact:
+        df = compact_frame(promote_header(df))
+
+    memory_bytes = int(df.memory_usage(deep=True).sum())
+    if 'memory_saved_bytes' not in stats and columns is not None and len(df.columns):
+        # Scale by the skipped column count; exact figures need the full parse we avoided
+        stats['memory_saved_bytes'] = int(memory_bytes / len(df.columns) * (columns_total - len(df.columns)))
+        stats['memory_saved_estimated'] = True
+
+    stats.update(
+        parse_seconds=time.perf_counter() - start,
+        rows=len(df),
+        columns_loaded=len(df.columns),
+        columns_total=columns_total,
+        memory_bytes=memory_bytes,
+    )
+    stats.setdefault('memory_saved_bytes', 0)
+    _stats.last = stats
+    return df
+
+
+def last_load_stats():
+    """Return parse time / memory figures for the last read on this thread"""
+    return dict(getattr(_stats, 'last', {}))
+
+
+def _read_xlsx_sheets(xlsx_path, names):
+    """Parse the given sheets with a single open of the workbook"""
+    if CalamineWorkbook is not None:
+        wb = CalamineWorkbook.from_path(os.fspath(xlsx_path))
+        return {name: _read_calamine(xlsx_path, name, wb=wb) for name in names}
+    # One ExcelFile shares the unzipped archive and shared strings across sheets
+    with pd.ExcelFile(xlsx_path) as xls:
+        return {name: xls.parse(name) for name in names}
+
+
+def _read_sheet_group(xlsx_path, names):
+    """Process-pool task: one open of the workbook for a group of sheets"""
+    return _read_xlsx_sheets(xlsx_path, names)
+
+
+def read_workbook(xlsx_path, sheets=None, jobs=1):
+    """Read several sheets of a workbook in one pass; returns {sheet name: DataFrame}
+
+    Fresh snapshots are memory-mapped per sheet. Otherwise the xlsx is
+    opened once for all requested sheets; with jobs > 1 the sheets are
+    split into that many groups parsed in parallel worker processes, so a
+    multi-sheet workbook loads in about the time of its largest sheet.
+    """
+    names = sheet_names(xlsx_path) if sheets is None else list(sheets)
+    if snapshot_is_fresh(xlsx_path):
+        return {name: read_sheet(xlsx_path, sheet_name=name) for name in names}
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(names)))
+    if jobs == 1:
+        return _read_xlsx_sheets(xlsx_path, names)
+
+    groups = [names[i::jobs] for i in range(jobs)]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        parts = pool.map(_read_sheet_group, [xlsx_path] * jobs, groups)
+        frames = {name: df for part in parts for name, df in part.items()}
+    return {name: frames[name] for name in names}
+
+
+def load_workbooks(paths, jobs=None):
+    """Read every sheet of several workbooks, one worker process per workbook
+
+    Returns {path: {sheet name: DataFrame}}. jobs defaults to the CPU count.
+    """
+    paths = list(paths)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(paths) or 1))
+    if jobs == 1:
+        return {path: read_workbook(path) for path in paths}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return dict(zip(paths, pool.map(read_workbook, paths)))
+
+
+class LazyWorkbook(Mapping):
+    """Sheets of a workbook, each parsed on first access and kept afterwards
+
+    Sheet names come from the snapshot manifest or the workbook index, so
+    listing sheets does not parse any cell data. load() reads every sheet
+    not yet loaded in one pass (see read_workbook). compact=True keeps every
+    sheet in the compact representation.
+    """
+
+    def __init__(self, xlsx_path, compact=False):
+        self.path = xlsx_path
+        self.compact = compact
+        self.names = sheet_names(xlsx_path)
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, sheet_name):
+        if isinstance(sheet_name, int):
+            sheet_name = self.names[sheet_name]
+        if sheet_name not in self.names:
+            raise KeyError(sheet_name)
+        with self._lock:
+            if sheet_name not in self._frames:
+                self._frames[sheet_name] = read_sheet(self.path, sheet_name=sheet_name, compact=self.compact)
+            return self._frames[sheet_name]
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def is_loaded(self, sheet_name):
+        return sheet_name in self._frames
+
+    def load(self, jobs=1):
+        """Parse every remaining sheet at once; returns self"""
+        with self._lock:
+            missing = [name for name in self.names if name not in self._frames]
+            if missing:
+                frames = read_workbook(self.path, missing, jobs=jobs)
+                if self.compact:
+                    frames = {name: compact_frame(promote_header(df)) for name, df in frames.items()}
+                self._frames.update(frames)
+        return self
+
+
+def stream_columns(source, columns, sheet_name=0):
+    """Read only the selected columns with read-only openpyxl row iteration
+
+    source may be a path or a seekable file object; columns is a projection
+    as accepted by resolve_columns. Cells of other columns are never kept,
+    so memory grows with the projection rather than the sheet width.
+    """
+    import openpyxl
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        rows = ws.iter_rows(values_only=True)
+        names = header_names(next(rows, ()))
+        positions = resolve_columns(names, columns)
+
+        values = {pos: [] for pos in positions}
+        row_count = 0
+        last_non_empty = 0
+        for row in rows:
+            row_count += 1
+            if any(v is not None for v in row):
+                last_non_empty = row_count
+            for pos in positions:
+                values[pos].append(row[pos] if pos < len(row) else None)
+    finally:
+        wb.close()
+
+    # Trailing blank rows are dropped, matching pd.read_excel
+    return pd.DataFrame({names[pos]: values[pos][:last_non_empty] for pos in positions})
+
+
+def main(paths):
+    paths = paths or SOURCE_WORKBOOKS
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"⚠️  Skipping {path}: file not found")
+            continue
+        if snapshot_is_fresh(path):
+            print(f"✅ {path}: snapshot up to date")
+            continue
+        manifest = build_snapshot(path)
+        sheets = ', '.join(f"{s['name']} ({s['rows']} rows)" for s in manifest['sheets'])
+        print(f"📦 {path}: {sheets}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,313 @@
+"""
+RMS Data Service
+Keeps every RMS workbook parsed and warm, and serves pre-aggregated JSON
+for the HTML dashboards with gzip compression and ETags.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import pandas as pd
+from flask import Blueprint, jsonify, request, current_app
+from data_loader import read_sheet, ensure_snapshot, promote_header
+from workbook_cache import file_key
+from cube import AggregateCube, DIMENSIONS
+from aging import bucket_counts, buckets_from_edges, date_column
+from search import TextIndex, TEXT_COLUMNS
+
+# Dataset name -> source workbook
+DATASETS = {
+    'db': 'DB.xlsx',
+    'spd': 'SPD.xlsx',
+    'rectifier': 'Rectifier.xlsx',
+    'rectifier_fan': 'Rectifier Fan.xlsx',
+    'dse': 'DSE.xlsx',
+    'events': 'events.xlsx',
+    'tenant': 'tenant.xlsx',
+    'locations': 'Locations.xlsx',
+}
+
+# Header spellings unified across workbooks
+COLUMN_ALIASES = {'ENF Site ID': 'Site Id'}
+
+# Columns the dashboards break counts down by (DB uses Cluster, device sheets Region)
+GROUP_COLUMNS = ['Sub Region', 'Cluster', 'Region', 'Aging', 'Domain', 'ES POC']
+
+# RMS_COMPACT=1 holds sheets in the compact representation (see compact.py); plain frames by default
+COMPACT = os.environ.get('RMS_COMPACT', '0') == '1'
+
+GZIP_MIN_SIZE = 500
+MAX_CACHED_RESPONSES = 64  # Per dataset version
+
+
+def value_counts(series):
+    """Non-blank value counts as a plain {value: count} dict, largest first"""
+    counts = series.value_counts()
+    return {str(value): int(count) for value, count in counts.items() if count > 0}
+
+
+def summarize(df):
+    """Counts by every group column present in the sheet"""
+    return {
+        'rows': len(df),
+        'counts': {col: value_counts(df[col]) for col in GROUP_COLUMNS if col in df.columns}
+    }
+
+
+def build_cube(df):
+    """Aggregate cube of a sheet; None without cube dimensions or when the cube would be too large"""
+    if not any(dim in df.columns for dim in DIMENSIONS):
+        return None
+    try:
+        return AggregateCube(df)
+    except ValueError:
+        return None  # Only /cube is unavailable; the other routes still serve the sheet
+
+
+def prepare(df):
+    """Promote offset headers and unify column names across workbooks"""
+    return promote_header(df).rename(columns=COLUMN_ALIASES)
+
+
+def to_records(df):
+    """JSON-safe row records: NaN -> null, datetimes -> ISO strings"""
+    out = df.copy()
+    for col in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[col]):
+            out[col] = out[col].dt.strftime('%Y-%m-%dT%H:%M:%S')
+    out = out.astype(object).where(out.notna(), None)
+    return out.to_dict(orient='records')
+
+
+class DataService:
+    """Parses each workbook once, re-parsing only when its mtime/size changes"""
+
+    def __init__(self, datasets=DATASETS, base_dir='.', compact=COMPACT):
+        self.datasets = datasets
+        self.base_dir = base_dir
+        self.compact = compact
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def path(self, name):
+        return os.path.join(self.base_dir, self.datasets[name])
+
+    def get(self, name):
+        """Return the warm entry for a dataset: {'version', 'data', 'summary', 'cube', 'search', 'responses'}"""
+        path = self.path(name)
+        version = file_key(path)
+        entry = self._entries.get(name)
+        if entry is not None and entry['version'] == version:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry['version'] != version:
+                ensure_snapshot(path)
+                df = prepare(read_sheet(path, compact=self.compact))
+                previous = entry['search'] if entry is not None else None
+                entry = {
+                    'version': version,
+                    'etag': hashlib.sha1(repr(version).encode('utf-8')).hexdigest()[:16],
+                    'data': df,
+                    'summary': summarize(df),
+                    'cube': build_cube(df),
+                    # Re-indexing reuses the previous version's tokens
+                    'search': TextIndex(df, previous) if any(col in df.columns for col in TEXT_COLUMNS) else None,
+                    'responses': {}
+                }
+                self._entries[name] = entry
+        return entry
+
+    def peek(self, name):
+        """Return the current entry without checking the file for changes"""
+        return self._entries.get(name)
+
+    def warm(self):
+        """Load every dataset that exists on disk"""
+        for name in self.datasets:
+            if os.path.exists(self.path(name)):
+                self.get(name)
+
+    def loaded(self):
+        return {name: entry['version'] for name, entry in self._entries.items()}
+
+
+data_service = DataService()
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+
+def cached_json(entry, key, build):
+    """Serve a JSON body built once per dataset version, gzip'd and ETag'd"""
+    etag = f"{entry['etag']}-{hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:12]}"
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    bodies = entry['responses'].get(key)
+    if bodies is None:
+        body = json.dumps(build(), separators=(',', ':'), default=str).encode('utf-8')
+        bodies = (body, gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_SIZE else None)
+        if len(entry['responses']) >= MAX_CACHED_RESPONSES:
+            entry['responses'].clear()
+        entry['responses'][key] = bodies
+
+    body, compressed = bodies
+    response = current_app.response_class(mimetype='application/json')
+    if compressed is not None and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response.set_data(body)
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    response.cache_control.no_cache = True  # Always revalidate; 304s are cheap
+    return response
+
+
+def _dataset_entry(name):
+    if name not in data_service.datasets:
+        return None, (jsonify({'error': f'Unknown dataset: {name}'}), 404)
+    if not os.path.exists(data_service.path(name)):
+        return None, (jsonify({'error': f'{data_service.datasets[name]} not found'}), 404)
+    return data_service.get(name), None
+
+
+@api.route('/datasets')
+def datasets():
+    """List the datasets the service can serve"""
+    return jsonify({name: {'file': file, 'available': os.path.exists(data_service.path(name))}
+                    for name, file in data_service.datasets.items()})
+
+
+@api.route('/<name>/summary')
+def summary(name):
+    """Counts by Sub Region / Cluster / Region / Aging / Domain / ES POC"""
+    entry, error = _dataset_entry(name)
+    if error:
+        return error
+    return cached_json(entry, 'summary', lambda: dict(dataset=name, **entry['summary']))
+
+
+@api.route('/<name>/counts/<path:column>')
+def counts(name, column):
+    """Counts for a single column, e.g. /api/spd/counts/Alarm"""
+    entry, error = _dataset_entry(name)
+    if error:
+        return error
+    if column not in entry['data'].columns:
+        return jsonify({'error': f'Column not found: {column}'}), 404
+    return cached_json(entry, ('counts', column),
+                       lambda: {'dataset': name, 'column': column, 'counts': value_counts(entry['data'][column])})
+
+
+@api.route('/<name>/rows')
+def rows(name):
+    """Row records, optionally projected with ?columns=Site Id,Aging"""
+    entry, error = _dataset_entry(name)
+    if error:
+        return error
+    df = entry['data']
+    columns = tuple(c for c in request.args.get('columns', '').split(',') if c)
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        return jsonify({'error': f'Columns not found: {missing}'}), 404
+    return cached_json(entry, ('rows', columns),
+                       lambda: {'dataset': name, 'rows': to_records(df[list(columns)] if columns else df)})
+
+
+@api.route('/<name>/cube')
+def cube(name):
+    """Roll-ups from the aggregate cube, e.g. /api/db/cube?by=Sub Region,Aging&Domain=Enfra"""
+    entry, error = _dataset_entry(name)
+    if error:
+        return error
+    if entry['cube'] is None:
+        return jsonify({'error': f'No aggregate cube for {name}'}), 404
+
+    by = tuple(dim for dim in request.args.get('by', '').split(',') if dim)
+    filters = {dim: tuple(request.args.getlist(dim)) for dim in entry['cube'].dimensions if dim in request.args}
+    try:
+        counts = entry['cube'].query(by=by, filters=filters)
+    except KeyError as e:
+        return jsonify({'error': str(e.args[0])}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    def build():
+        if not by:
+            return {'dataset': name, 'filters': filters, 'count': counts}
+        cells = [dict(zip(by, key if len(by) > 1 else (key,)), count=count) for key, count in counts.items()]
+        return {'dataset': name, 'by': by, 'filters': filters, 'cells': cells}
+
+    return cached_json(entry, ('cube', by, tuple(sorted(filters.items()))), build)
+
+
+@api.route('/<name>/aging')
+def aging(name):
+    """Aging buckets recomputed against now, per region by default
+
+    e.g. /api/spd/aging?by=Sub Region&edges=0,11,31,101,181&now=2025-11-05T00:00
+    """
+    entry, error = _dataset_entry(name)
+    if error:
+        return error
+    df = entry['data']
+    try:
+        date_column(df)
+        buckets = buckets_from_edges(request.args['edges'].split(',')) if request.args.get('edges') else None
+        now = pd.Timestamp(request.args['now']) if request.args.get('now') else pd.Timestamp.now().floor('min')
+    except KeyError as e:
+        return jsonify({'error': str(e.args[0])}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    by = request.args.get('by', 'region')
+    if by not in ('region', '') and by not in df.columns:
+        return jsonify({'error': f'Column not found: {by}'}), 404
+
+    edges = tuple(low for low, _ in buckets) if buckets else None
+    return cached_json(entry, ('aging', by, edges, now.isoformat()),
+                       lambda: {'dataset': name, 'now': now.isoformat(), 'by': by or None,
+                                'counts': bucket_counts(df, by=by or None, now=now, buckets=buckets)})
+
+
+@api.route('/<name>/search')
+def search(name):
+    """Free-text search over History / Reason / Summarised / History | Issue
+
+    e.g. /api/db/search?q="ecm swapped" r%26r&Sub Region=Sukkur&Domain=Enfra&limit=50
+    Words are ANDed, "quotes" make a phrase and a trailing * a prefix. The
+    response has the match count, the top reason categories and up to
+    ?limit= rows (default 100).
+    """
+    entry, error = _dataset_entry(name)
+    if error:
+        return error
+    index = entry['search']
+    if index is None:
+        return jsonify({'error': f'No text columns in {name}'}), 404
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    try:
+        limit = max(0, min(int(request.args.get('limit', 100)), 5000))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    filters = {col: tuple(request.args.getlist(col)) for col in index.filters if col in request.args}
+    columns = tuple(col for col in request.args.get('columns', '').split(',') if col) or None
+    unknown = [col for col in columns or () if col not in index.columns]
+    if unknown:
+        return jsonify({'error': f'Unknown text columns: {unknown}', 'columns': index.columns}), 400
+
+    def build():
+        matched = index.search(query, filters=filters, columns=columns)
+        return {'dataset': name, 'q': query, 'filters': filters, 'count': len(matched),
+                'categories': [{'category': category, 'count': count}
+                               for category, count in index.categories(matched)],
+                'rows': to_records(entry['data'].iloc[matched[:limit]])}
+
+    return cached_json(entry, ('search', query, tuple(sorted(filters.items())), columns, limit), build)
@@ -1,27 +1,26 @@
-import pandas as pd
-import numpy as np
+from data_loader import read_workbook
 
-def examine_excel_file(file_path):
+def examine_excel_file(file_path, jobs=1):
     """
     Examine the Excel file structure and display basic information
     """
     try:
-        # Read the Excel file
-        excel_file = pd.ExcelFile(file_path)
+        # Read every sheet in one pass (jobs > 1 parses sheets in parallel)
+        sheets = read_workbook(file_path, jobs=jobs)
+        names = list(sheets)
         
         print("Excel File Analysis")
         print("=" * 50)
         print(f"File: {file_path}")
-        print(f"Sheet Names: {excel_file.sheet_names}")
+        print(f"Sheet Names: {names}")
         print()
         
         # Analyze each sheet
-        for sheet_name in excel_file.sheet_names:
+        for sheet_name in names:
             print(f"Sheet: {sheet_name}")
             print("-" * 30)
             
-            # Read the sheet
-            df = pd.read_excel(file_path, sheet_name=sheet_name)
+            df = sheets[sheet_name]
             
             print(f"Shape: {df.shape}")
             print(f"Columns: {list(df.columns)}")
@@ -0,0 +1,277 @@
+"""
+Streaming Export
+Filtered row sets and aggregate tables of any dataset, written as CSV,
+JSON lines or XLSX a chunk of rows at a time: memory stays flat however
+many rows match, and an HTTP download starts with the first chunk instead
+of after the whole result is built.
+
+Filters are column=value pairs (several values for one column are ORed).
+Domain rolls up to Enfra / SMS LD / Others like Column L, and Aging and
+Days Passed are recomputed against now, so e.g. every 100+ Days Enfra site
+in Larkana that has a History note is
+
+    GET /api/db/export.csv?Cluster=Larkana&Aging=100%2B+Days&Domain=Enfra&has=History
+    python export.py db -f Cluster=Larkana -f "Aging=100+ Days" -f Domain=Enfra --has History -o larkana.csv
+
+q= adds a free-text search (see search.py), columns= projects the output
+and by= exports row counts per group instead of rows. XLSX goes through
+openpyxl's write-only mode into a temp file; the zip container is only
+complete after the last row, so an XLSX download starts once the
+workbook is written.
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+from flask import Blueprint, Response, jsonify, request
+from data_service import data_service
+from column_l import classify_codes, CATEGORIES
+from aging import date_column, recompute
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+CHUNK_ROWS = 10_000
+XLSX_BLOCK = 64 * 1024
+
+# Query parameters that are not column filters
+OPTIONS = {'q', 'columns', 'has', 'by', 'now'}
+
+
+def filter_mask(df, filters):
+    """Rows matching every column filter; values of one column are ORed"""
+    mask = np.ones(len(df), dtype=bool)
+    for col, values in filters.items():
+        if col not in df.columns:
+            raise KeyError(f"Column not found: {col}")
+        values = [values] if isinstance(values, str) else list(values)
+        series = df[col]
+        if col == 'Domain':
+            wanted = [CATEGORIES.index(value) for value in values if value in CATEGORIES]
+            mask &= np.isin(classify_codes(series), wanted)
+        elif series.dtype.kind == 'O':
+            mask &= series.isin(values).to_numpy()
+        else:  # Numbers and dates are matched on their text
+            mask &= series.astype(str).isin(values).to_numpy()
+    return mask
+
+
+class RowExport:
+    """Chunks of the rows of a sheet matching filters, search hits and non-blank columns
+
+    rows: sorted row positions to restrict to (search results)
+    has: columns that must be non-blank
+    columns: output projection; the header is known before any row is read
+    """
+
+    def __init__(self, df, filters=None, rows=None, has=(), columns=None, now=None, chunk_rows=CHUNK_ROWS):
+        self.df = df
+        self.filters = dict(filters or {})
+        self.rows = rows
+        self.has = list(has)
+        self.chunk_rows = chunk_rows
+        try:
+            date_column(df)
+            self.now = pd.Timestamp(now) if now else pd.Timestamp.now().floor('min')
+        except KeyError:
+            self.now = None  # No timestamp column; the exported Aging stands
+
+        self.available = list(self._prepare(df.iloc[:0]).columns)
+        unknown = [col for col in [*self.filters, *self.has, *(columns or ())] if col not in self.available]
+        if unknown:
+            raise KeyError(f"Columns not found: {unknown}")
+        self.columns = list(columns) if columns else self.available
+
+    def _prepare(self, chunk):
+        return recompute(chunk, self.now) if self.now is not None else chunk
+
+    def __iter__(self):
+        for start in range(0, len(self.df), self.chunk_rows):
+            if self.rows is None:
+                chunk = self.df.iloc[start:start + self.chunk_rows]
+            else:
+                low, high = np.searchsorted(self.rows, [start, start + self.chunk_rows])
+                if low == high:
+                    continue
+                chunk = self.df.iloc[self.rows[low:high]]
+            chunk = self._prepare(chunk)
+            mask = filter_mask(chunk, self.filters)
+            for col in self.has:
+                mask &= chunk[col].notna().to_numpy()
+            if mask.any():
+                yield chunk.loc[mask, self.columns]
+
+
+def aggregate(export, by):
+    """Row counts per group of `by` columns over an export, one chunk at a time"""
+    unknown = [col for col in by if col not in export.available]
+    if unknown:
+        raise KeyError(f"Columns not found: {unknown}")
+    export.columns = list(by)
+    total = None
+    for chunk in export:
+        counts = chunk.groupby(list(by), observed=True, dropna=False).size()
+        total = counts if total is None else total.add(counts, fill_value=0)
+    if total is None:
+        return pd.DataFrame(columns=[*by, 'count'])
+    return total.astype(np.int64).rename('count').reset_index()
+
+
+def _plain(chunk):
+    """Values writers can take: ISO datetimes, None for blanks, plain objects for categoricals"""
+    out = chunk.copy()
+    for col in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[col]):
+            out[col] = out[col].dt.strftime('%Y-%m-%dT%H:%M:%S')
+    return out.astype(object).where(out.notna(), None)
+
+
+def write_csv(header, chunks):
+    buffer = io.StringIO()
+    pd.DataFrame(columns=header).to_csv(buffer, index=False)
+    yield buffer.getvalue().encode('utf-8')
+    for chunk in chunks:
+        buffer = io.StringIO()
+        _plain(chunk).to_csv(buffer, header=False, index=False)
+        yield buffer.getvalue().encode('utf-8')
+
+
+def write_jsonl(header, chunks):
+    for chunk in chunks:
+        # Tuples zipped with the header; DataFrame.to_dict boxes every cell one at a time
+        yield ''.join(json.dumps(dict(zip(header, row)), default=str, ensure_ascii=False) + '\n'
+                      for row in _plain(chunk).itertuples(index=False, name=None)).encode('utf-8')
+
+
+def write_xlsx(header, chunks, title='Export'):
+    from openpyxl import Workbook  # Only XLSX exports pay for the import
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title[:31])
+    ws.append(header)
+    for chunk in chunks:
+        for row in _plain(chunk).itertuples(index=False, name=None):
+            ws.append(row)
+    with tempfile.TemporaryFile() as f:
+        wb.save(f)
+        f.seek(0)
+        yield from iter(lambda: f.read(XLSX_BLOCK), b'')
+
+
+WRITERS = {'csv': write_csv, 'jsonl': write_jsonl, 'xlsx': write_xlsx}
+
+
+def export_stream(df, fmt, filters=None, rows=None, has=(), columns=None, by=None, now=None, title='Export'):
+    """Generator of the encoded export: matching rows, or counts per `by` group"""
+    export = RowExport(df, filters, rows, has, columns, now)
+    if by:
+        table = aggregate(export, by)
+        return WRITERS[fmt](list(table.columns), [table], *((title,) if fmt == 'xlsx' else ()))
+    return WRITERS[fmt](export.columns, export, *((title,) if fmt == 'xlsx' else ()))
+
+
+def _export_args(args):
+    """(filters, has, columns, by, now) from query parameters / CLI options"""
+    def split(value):
+        return [item for item in (value or '').split(',') if item]
+
+    filters = {col: args.getlist(col) for col in args if col not in OPTIONS}
+    return filters, split(args.get('has')), split(args.get('columns')), split(args.get('by')), args.get('now')
+
+
+export_api = Blueprint('export', __name__, url_prefix='/api')
+
+
+@export_api.route('/<name>/export.<any(csv, jsonl, xlsx):fmt>')
+def export(name, fmt):
+    """Streamed download of filtered rows or grouped counts
+
+    e.g. /api/db/export.csv?Cluster=Larkana&Aging=100%2B+Days&Domain=Enfra&has=History
+         /api/events/export.xlsx?by=Sub Region,Aging
+    """
+    if name not in data_service.datasets:
+        return jsonify({'error': f'Unknown dataset: {name}'}), 404
+    if not os.path.exists(data_service.path(name)):
+        return jsonify({'error': f'{data_service.datasets[name]} not found'}), 404
+    entry = data_service.get(name)
+    filters, has, columns, by, now = _export_args(request.args)
+
+    rows = None
+    query = request.args.get('q', '').strip()
+    if query:
+        if entry['search'] is None:
+            return jsonify({'error': f'No text columns in {name}'}), 404
+        rows = entry['search'].search(query)
+    try:
+        body = export_stream(entry['data'], fmt, filters, rows, has, columns, by, now, title=name)
+    except KeyError as e:
+        return jsonify({'error': str(e.args[0])}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = Response(body, mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{name}_export.{fmt}"'
+    response.headers['X-Accel-Buffering'] = 'no'  # Let proxies pass chunks through as they come
+    return response
+
+
+class _Options(dict):
+    """argparse filters in the shape of request.args"""
+
+    def getlist(self, key):
+        return self[key]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream filtered rows or grouped counts to CSV / JSON lines / XLSX")
+    parser.add_argument('dataset', choices=list(data_service.datasets))
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS), help='Default: from the output extension, else csv')
+    parser.add_argument('--output', '-o', help='Output file (default: stdout)')
+    parser.add_argument('--filter', '-f', action='append', default=[], metavar='COLUMN=VALUE')
+    parser.add_argument('--q', help='Free-text search over the History / Reason columns')
+    parser.add_argument('--has', default='', help='Comma-separated columns that must be non-blank')
+    parser.add_argument('--columns', default='', help='Comma-separated output columns')
+    parser.add_argument('--by', default='', help='Export counts per group of these columns')
+    parser.add_argument('--now', help='Reference time for aging (default: current time)')
+    args = parser.parse_args()
+
+    fmt = args.format or (os.path.splitext(args.output)[1].lstrip('.') if args.output else 'csv')
+    if fmt not in EXPORT_FORMATS:
+        parser.error(f"Unknown format {fmt!r}; use --format {'/'.join(EXPORT_FORMATS)}")
+    options = _Options({'has': args.has, 'columns': args.columns, 'by': args.by, 'now': args.now})
+    for item in args.filter:
+        col, sep, value = item.partition('=')
+        if not sep:
+            parser.error(f"Filters are COLUMN=VALUE, got {item!r}")
+        options.setdefault(col, []).append(value)
+
+    entry = data_service.get(args.dataset)
+    filters, has, columns, by, now = _export_args(options)
+    rows = None
+    if args.q:
+        if entry['search'] is None:
+            parser.error(f"No text columns in {args.dataset}")
+        rows = entry['search'].search(args.q)
+    try:
+        body = export_stream(entry['data'], fmt, filters, rows, has, columns, by, now, title=args.dataset)
+        out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+        try:
+            written = sum(out.write(block) for block in body)
+        finally:
+            if args.output:
+                out.close()
+    except KeyError as e:
+        parser.error(str(e.args[0]))
+    if args.output:
+        print(f"📥 {args.dataset}: {written / 1024:.1f} KB -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Offline Site History Store
+Append-only, date-partitioned Arrow log of every workbook export. Each
+ingest writes only the sites whose rows changed since the previous export
+(plus a close record for sites that disappeared), so a year of daily
+exports costs little more than the churn. Daily partitions of finished
+months are compacted into one file per month.
+
+Trend queries turn the log into per-site validity intervals and count the
+open rows per day with a difference array, without replaying snapshots.
+
+    python history.py ingest [dataset ...] [--date 2025-11-10]
+    python history.py trend db --start 2025-08-01 --end 2025-11-10 --by "Sub Region,Domain"
+    python history.py compact [dataset ...]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import re
+import threading
+import numpy as np
+import pandas as pd
+from flask import Blueprint, jsonify, request
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # The history store needs pyarrow; the rest of the app does not
+    pa = None
+    feather = None
+
+from aging import DATE_COLUMNS
+from column_l import classify_codes, CATEGORIES
+from data_loader import to_arrow
+from data_service import data_service, to_records
+from watcher import site_hashes, SITE_ID_COLUMN
+
+HISTORY_DIR = os.environ.get('RMS_HISTORY_DIR', '.history')
+COMPACT_AFTER = 31  # Daily partitions kept before finished months are compacted
+
+# Bookkeeping columns added to every logged row
+DATE, SEQ, OP, HASH = '_date', '_seq', '_op', '_hash'
+OPEN, CHANGE, CLOSE = 'open', 'change', 'close'
+CURRENT = pd.Timestamp.max.normalize()  # valid_to of versions still current
+
+_DAILY = re.compile(r'(\d{4}-\d{2}-\d{2})-(\d+)\.arrow$')
+_MONTHLY = re.compile(r'(\d{4}-\d{2})\.arrow$')
+
+
+def _as_date(value):
+    return pd.Timestamp(value).normalize() if value is not None else pd.Timestamp.now().normalize()
+
+
+def _plain(df):
+    """Categoricals as plain values so partitions written at different times concatenate"""
+    return df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+
+class HistoryStore:
+    """Per-dataset change log under root/<dataset>/"""
+
+    def __init__(self, root=HISTORY_DIR, compact_after=COMPACT_AFTER):
+        self.root = root
+        self.compact_after = compact_after
+        self._lock = threading.Lock()
+
+    def _dir(self, name):
+        return os.path.join(self.root, name)
+
+    def _manifest_path(self, name):
+        return os.path.join(self._dir(name), 'manifest.json')
+
+    def manifest(self, name):
+        try:
+            with open(self._manifest_path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'last_date': None, 'seq': 0}
+
+    def _write(self, table, path):
+        tmp_path = path + '.tmp'
+        feather.write_feather(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+
+    def _current(self, name):
+        """Site hashes as of the last ingest"""
+        path = os.path.join(self._dir(name), 'current.arrow')
+        if not os.path.exists(path):
+            return pd.Series(dtype='uint64')
+        current = feather.read_table(path).to_pandas()
+        return pd.Series(current['hash'].to_numpy(), index=current['site_id'].to_numpy())
+
+    def ingest(self, name, df, as_of=None):
+        """Log the changes in an export of a dataset; returns {'opened', 'changed', 'closed'} counts
+
+        as_of is the export date (default today). Exports older than the last
+        ingested one are rejected: the log is append-only.
+        """
+        if feather is None:
+            raise RuntimeError("pyarrow is not installed; the history store is unavailable")
+        if SITE_ID_COLUMN not in df.columns:
+            raise KeyError(f"{name} has no {SITE_ID_COLUMN} column")
+        as_of = _as_date(as_of)
+
+        with self._lock:
+            manifest = self.manifest(name)
+            if manifest['last_date'] and as_of < pd.Timestamp(manifest['last_date']):
+                raise ValueError(f"{as_of:%Y-%m-%d} is before the last ingested export "
+                                 f"({manifest['last_date']}); history is append-only")
+
+            df = df[df[SITE_ID_COLUMN].notna()].reset_index(drop=True)
+            df[SITE_ID_COLUMN] = df[SITE_ID_COLUMN].astype(str).str.strip().str.upper()
+            old, new = self._current(name), site_hashes(df)
+            opened = new.index.difference(old.index)
+            closed = old.index.difference(new.index)
+            common = new.index.intersection(old.index)
+            changed = common[new.loc[common].to_numpy() != old.loc[common].to_numpy()]
+
+            seq = manifest['seq'] + 1
+            logged = _plain(df[df[SITE_ID_COLUMN].isin(opened.union(changed))])
+            logged.insert(0, OP, np.where(logged[SITE_ID_COLUMN].isin(opened), OPEN, CHANGE))
+            closes = pd.DataFrame({SITE_ID_COLUMN: closed.to_numpy(dtype=object), OP: CLOSE})
+            logged = pd.concat([logged, closes], ignore_index=True) if len(closes) else logged
+            logged.insert(0, HASH, logged[SITE_ID_COLUMN].map(new).fillna(0).astype('uint64').to_numpy())
+            logged.insert(0, SEQ, seq)
+            logged.insert(0, DATE, as_of)
+
+            os.makedirs(self._dir(name), exist_ok=True)
+            if len(logged):
+                self._write(to_arrow(logged), os.path.join(self._dir(name), f"{as_of:%Y-%m-%d}-{seq:06d}.arrow"))
+            self._write(pa.table({'site_id': new.index.to_numpy(dtype=object), 'hash': new.to_numpy()}),
+                        os.path.join(self._dir(name), 'current.arrow'))
+            manifest.update(last_date=f"{as_of:%Y-%m-%d}", seq=seq)
+            with open(self._manifest_path(name) + '.tmp', 'w') as f:
+                json.dump(manifest, f)
+            os.replace(self._manifest_path(name) + '.tmp', self._manifest_path(name))
+
+        if len(self.partitions(name, monthly=False)) >= self.compact_after:
+            self.compact(name)
+        return {'opened': len(opened), 'changed': len(changed), 'closed': len(closed)}
+
+    def partitions(self, name, start=None, end=None, monthly=True):
+        """Log files overlapping [start, end], pruned by the date in their names"""
+        directory = self._dir(name)
+        if not os.path.isdir(directory):
+            return []
+        start = _as_date(start) if start is not None else None
+        end = _as_date(end) if end is not None else None
+        files = []
+        for file_name in sorted(os.listdir(directory)):
+            daily, month = _DAILY.match(file_name), _MONTHLY.match(file_name)
+            if daily:
+                first = last = pd.Timestamp(daily.group(1))
+            elif month and monthly:
+                first = pd.Timestamp(month.group(1) + '-01')
+                last = first + pd.offsets.MonthEnd(0)
+            else:
+                continue
+            if (start is None or last >= start) and (end is None or first <= end):
+                files.append(os.path.join(directory, file_name))
+        return files
+
+    def compact(self, name, before=None):
+        """Merge the daily partitions of every month finished before `before` into one file each"""
+        cutoff = _as_date(before).replace(day=1) if before is not None else pd.Timestamp.now().normalize().replace(day=1)
+        with self._lock:
+            months = {}
+            for path in self.partitions(name, monthly=False):
+                day = pd.Timestamp(_DAILY.search(path).group(1))
+                if day < cutoff:
+                    months.setdefault(f"{day:%Y-%m}", []).append(path)
+            for month, paths in months.items():
+                target = os.path.join(self._dir(name), f"{month}.arrow")
+                if os.path.exists(target):
+                    paths = [target] + paths
+                table = pa.concat_tables([feather.read_table(p) for p in paths], promote_options='permissive')
+                table = table.sort_by([(SITE_ID_COLUMN, 'ascending'), (SEQ, 'ascending')])
+                self._write(table, target)
+                for path in paths:
+                    if path != target:
+                        os.remove(path)
+        return sorted(months)
+
+    def log(self, name, start=None, end=None, columns=None):
+        """Logged rows up to `end` (all of them before `start` too: state carries forward)"""
+        paths = self.partitions(name, end=end)
+        if not paths:
+            return pd.DataFrame(columns=[DATE, SEQ, OP, HASH, SITE_ID_COLUMN])
+        tables = []
+        for path in paths:
+            # Only the wanted columns are decompressed
+            wanted = None
+            if columns is not None:
+                with pa.memory_map(path) as source:
+                    present = pa.ipc.open_file(source).schema.names
+                wanted = [c for c in dict.fromkeys([DATE, SEQ, OP, HASH, SITE_ID_COLUMN, *columns]) if c in present]
+            tables.append(feather.read_table(path, columns=wanted))
+        df = pa.concat_tables(tables, promote_options='permissive').to_pandas()
+        if end is not None:
+            df = df[df[DATE] <= _as_date(end)]
+        return df.sort_values([SEQ], kind='stable').reset_index(drop=True)
+
+    def intervals(self, name, end=None, columns=None):
+        """Logged rows with the [valid_from, valid_to) span each site version was current"""
+        df = self.log(name, end=end, columns=columns)
+        versions = df[[SITE_ID_COLUMN, SEQ, DATE]].drop_duplicates([SITE_ID_COLUMN, SEQ])
+        versions = versions.sort_values([SITE_ID_COLUMN, SEQ], kind='stable')
+        next_date = versions.groupby(SITE_ID_COLUMN, sort=False)[DATE].shift(-1)
+        versions = versions.assign(valid_to=next_date.fillna(CURRENT))
+        df = df.merge(versions[[SITE_ID_COLUMN, SEQ, 'valid_to']], on=[SITE_ID_COLUMN, SEQ], how='left')
+        return df.rename(columns={DATE: 'valid_from'})
+
+    def trend(self, name, start, end, by=(), open_only=True):
+        """Open rows per day in [start, end], per combination of the `by` columns
+
+        open_only counts only rows with a timestamp (Offline Date / Beginning),
+        i.e. sites that are actually offline or alarming. Domain is rolled up
+        to Enfra / SMS LD / Others like Column L. Returns (dates, {group: counts}).
+        """
+        start, end = _as_date(start), _as_date(end)
+        dates = pd.date_range(start, end, freq='D')
+        columns = list(by)
+        rows = self.intervals(name, end=end, columns=columns + list(DATE_COLUMNS))
+        rows = rows[rows[OP] != CLOSE]
+        if open_only and len(rows):
+            stamp = [c for c in DATE_COLUMNS if c in rows.columns]
+            rows = rows[rows[stamp].notna().any(axis=1)] if stamp else rows.iloc[0:0]
+        if not len(rows):
+            return dates, {}
+
+        if not columns:
+            groups, labels = np.zeros(len(rows), dtype=np.intp), [()]
+        else:
+            keys = pd.DataFrame({col: _group_values(rows, col) for col in columns})
+            groups, uniques = pd.factorize(pd.MultiIndex.from_frame(keys), sort=True)
+            labels = list(uniques)
+
+        # Day offsets into the range; spans are clipped to it
+        first = ((rows['valid_from'] - start).dt.days.to_numpy()).clip(0, len(dates))
+        to = rows['valid_to'].clip(upper=end + pd.Timedelta(days=1))
+        last = ((to - start).dt.days.to_numpy()).clip(0, len(dates))
+        keep = last > first
+        diff = np.zeros((len(labels), len(dates) + 1), dtype=np.int64)
+        np.add.at(diff, (groups[keep], first[keep]), 1)
+        np.add.at(diff, (groups[keep], last[keep]), -1)
+        counts = np.cumsum(diff, axis=1)[:, :-1]
+        return dates, {label: counts[i] for i, label in enumerate(labels)}
+
+    def site_history(self, name, site_id):
+        """Every logged version of one site: opened / changed / closed, oldest first"""
+        df = self.intervals(name)
+        df = df[df[SITE_ID_COLUMN] == str(site_id).strip().upper()]
+        df = df.assign(valid_to=df['valid_to'].where(df['valid_to'] < CURRENT))
+        return df.drop(columns=[HASH]).sort_values([SEQ]).reset_index(drop=True)
+
+
+def _group_values(rows, col):
+    if col not in rows.columns:
+        return pd.Series('(missing)', index=rows.index)
+    if col == 'Domain':
+        return pd.Series(np.asarray(CATEGORIES)[classify_codes(rows[col])], index=rows.index)
+    return rows[col].astype(object).where(rows[col].notna(), '(blank)').astype(str)
+
+
+history_store = HistoryStore()
+
+history_api = Blueprint('history', __name__, url_prefix='/api')
+
+
+@history_api.route('/<name>/trend')
+def trend(name):
+    """Open rows per day, e.g. /api/db/trend?start=2025-08-01&end=2025-11-10&by=Sub Region,Domain"""
+    if name not in data_service.datasets:
+        return jsonify({'error': f'Unknown dataset: {name}'}), 404
+    by = [col for col in request.args.get('by', '').split(',') if col]
+    try:
+        end = _as_date(request.args.get('end'))
+        start = _as_date(request.args.get('start')) if request.args.get('start') else end - pd.Timedelta(days=89)
+        dates, series = history_store.trend(name, start, end, by=by,
+                                            open_only=request.args.get('open_only', '1') != '0')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'dataset': name,
+        'dates': [f"{d:%Y-%m-%d}" for d in dates],
+        'by': by,
+        'series': [dict(zip(by, label), counts=counts.tolist()) for label, counts in series.items()],
+    })
+
+
+@history_api.route('/<name>/history/<site_id>')
+def site_history(name, site_id):
+    """Open / change / close history of one site, e.g. /api/db/history/ES2-SUK-01527"""
+    if name not in data_service.datasets:
+        return jsonify({'error': f'Unknown dataset: {name}'}), 404
+    rows = history_store.site_history(name, site_id)
+    if rows.empty:
+        return jsonify({'error': f'No history for {site_id} in {name}'}), 404
+    rows = rows.rename(columns={SEQ: 'ingest', OP: 'event'})
+    return jsonify({'dataset': name, 'site_id': site_id, 'versions': to_records(rows)})
+
+
+def ingest_all(service=data_service, names=None, as_of=None):
+    """Ingest the current export of each dataset, dated by the workbook's mtime unless given
+
+    Returns {dataset: counts}, or {dataset: {'error': message}} for an
+    export the store refused (backdated, or no Site Id column).
+    """
+    results = {}
+    for name in names or service.datasets:
+        path = service.path(name)
+        if not os.path.exists(path):
+            continue
+        when = as_of or datetime.date.fromtimestamp(os.path.getmtime(path))
+        try:
+            results[name] = history_store.ingest(name, service.get(name)['data'], when)
+        except (KeyError, ValueError) as e:
+            results[name] = {'error': str(e)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline site history store")
+    sub = parser.add_subparsers(dest='command', required=True)
+    ingest = sub.add_parser('ingest', help='Log the current exports')
+    ingest.add_argument('datasets', nargs='*')
+    ingest.add_argument('--date', help='Export date (default: workbook modification date)')
+    query = sub.add_parser('trend', help='Open rows per day')
+    query.add_argument('dataset')
+    query.add_argument('--start')
+    query.add_argument('--end')
+    query.add_argument('--by', default='')
+    compact = sub.add_parser('compact', help='Merge finished months into one file each')
+    compact.add_argument('datasets', nargs='*')
+    args = parser.parse_args()
+
+    if args.command == 'ingest':
+        for name, counts in ingest_all(data_service, args.datasets, args.date).items():
+            if 'error' in counts:
+                print(f"⚠️  {name}: {counts['error']}")
+            else:
+                print(f"📥 {name}: {counts['opened']} opened, {counts['changed']} changed, {counts['closed']} closed")
+    elif args.command == 'trend':
+        end = _as_date(args.end)
+        start = _as_date(args.start) if args.start else end - pd.Timedelta(days=89)
+        by = [col for col in args.by.split(',') if col]
+        dates, series = history_store.trend(args.dataset, start, end, by=by)
+        if not series:
+            print(f"No open rows logged for {args.dataset} between {start:%Y-%m-%d} and {end:%Y-%m-%d}")
+        for label, counts in series.items():
+            print(f"{' / '.join(map(str, label)) or 'All':30} latest {counts[-1]:5}  peak {counts.max():5}")
+    else:
+        for name in args.datasets or data_service.datasets:
+            months = history_store.compact(name)
+            if months:
+                print(f"🗜️  {name}: compacted {', '.join(months)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Request Metrics
+Latency histograms per request endpoint and per processing stage (upload
+save, workbook read, classification, chart render, encoding), input row
+counts and any registered gauges, rendered in the Prometheus text format
+for /metrics.
+
+    with metrics.stage('read_excel'):
+        df = read_sheet(path)
+
+Stage timings of the current request are also kept per thread so the app
+can return them in a Server-Timing header.
+
+Profiling is opt-in: with RMS_PROFILE_DIR set, a request carrying
+?profile=1 (or every request slower than RMS_PROFILE_SLOW_SECONDS) is run
+under cProfile and its hottest functions are written to that directory.
+"""
+
+import bisect
+import io
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ROW_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+PROFILE_DIR = os.environ.get('RMS_PROFILE_DIR')
+PROFILE_SLOW_SECONDS = float(os.environ.get('RMS_PROFILE_SLOW_SECONDS', 0)) or None
+PROFILE_TOP = 40  # Functions listed in a profile dump
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects"""
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if position < len(self.buckets):
+                series[position] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self):
+        """(labels, cumulative bucket counts, sum, count) per label set"""
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative, total = [], 0
+            for count in series[:len(self.buckets)]:
+                total += count
+                cumulative.append(total)
+            yield labels, cumulative, series[-2], series[-1]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, cumulative, total, count in self.samples():
+            pairs = list(zip(self.label_names, labels))
+            for bound, value in zip(self.buckets, cumulative):
+                lines.append(f"{self.name}_bucket{_labels(pairs, le=_number(bound))} {value}")
+            lines.append(f"{self.name}_bucket{_labels(pairs, le='+Inf')} {count}")
+            lines.append(f"{self.name}_sum{_labels(pairs)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(pairs)} {count}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(pairs, **extra):
+    pairs = list(pairs) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """Process-wide registry of the app's histograms and gauge collectors"""
+
+    def __init__(self):
+        self.requests = Histogram('rms_request_seconds', 'Request latency by endpoint and status',
+                                  ['endpoint', 'method', 'status'])
+        self.stages = Histogram('rms_stage_seconds', 'Time spent per processing stage', ['stage'])
+        self.rows = Histogram('rms_input_rows', 'Rows in each analysed workbook', ['endpoint'],
+                              buckets=ROW_BUCKETS)
+        self._collectors = []
+        self._local = threading.local()
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block into the stage histogram (and the current request's timings)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.stages.observe(seconds, name)
+            timings = getattr(self._local, 'timings', None)
+            if timings is not None:
+                timings.append((name, seconds))
+
+    def begin_request(self):
+        self._local.timings = []
+
+    def end_request(self):
+        """Stage timings recorded since begin_request on this thread"""
+        timings, self._local.timings = getattr(self._local, 'timings', None) or [], None
+        return timings
+
+    def observe_request(self, endpoint, method, status, seconds):
+        self.requests.observe(seconds, endpoint or 'unknown', method, str(status))
+
+    def observe_rows(self, endpoint, rows):
+        self.rows.observe(rows, endpoint or 'unknown')
+
+    def collector(self, fn):
+        """Register fn() -> [(name, type, help, [(labels dict, value), ...]), ...]; usable as a decorator"""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = self.requests.render() + self.stages.render() + self.rows.render()
+        for fn in self._collectors:
+            for name, kind, help_text, samples in fn():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{_labels(labels.items())} {_number(value)}" for labels, value in samples]
+        return '\n'.join(lines) + '\n'
+
+
+def server_timing(timings):
+    """Server-Timing header value for a request's stage timings"""
+    return ', '.join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings)
+
+
+class RequestProfiler:
+    """cProfile for one request at a time, dumping the hot path of slow or flagged requests"""
+
+    def __init__(self, directory=PROFILE_DIR, slow_seconds=PROFILE_SLOW_SECONDS, top=PROFILE_TOP):
+        self.directory = directory
+        self.slow_seconds = slow_seconds
+        self.top = top
+        self._busy = threading.Lock()  # One profiler at a time; concurrent requests run unprofiled
+        self._local = threading.local()
+
+    @property
+    def enabled(self):
+        return bool(self.directory)
+
+    def start(self, requested=False):
+        """Profile the current request if asked to (or if slow requests are being caught)"""
+        if not self.enabled or not (requested or self.slow_seconds):
+            return False
+        if not self._busy.acquire(blocking=False):
+            return False
+        import cProfile  # Only profiling runs pay for the import
+        profile = cProfile.Profile()
+        self._local.profile = (profile, requested)
+        profile.enable()
+        return True
+
+    def stop(self, label, seconds):
+        """Stop profiling; returns the dump path when the request was flagged or slow"""
+        state = getattr(self._local, 'profile', None)
+        if state is None:
+            return None
+        profile, requested = state
+        profile.disable()
+        self._local.profile = None
+        self._busy.release()
+        if not requested and seconds < self.slow_seconds:
+            return None
+
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{re.sub(r'[^A-Za-z0-9_.-]', '_', label)}-{int(seconds * 1000)}ms"
+        base = os.path.join(self.directory, name)
+        profile.dump_stats(base + '.prof')
+        import pstats
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats('cumulative').print_stats(self.top)
+        with open(base + '.txt', 'w') as f:
+            f.write(f"{label}: {seconds:.3f}s\n")
+            f.write(out.getvalue())
+        return base + '.txt'
+
+
+# Shared by every request handler in the process
+metrics = Metrics()
+profiler = RequestProfiler()
@@ -0,0 +1,168 @@
+"""
+Column Profiling Engine
+Computes every per-column statistic the dashboard reports (nulls, distinct
+counts, top values, describe() figures, IQR outliers) in one vectorized
+pass over the sheet.
+
+Above APPROX_ROWS the profile switches to approximate mode: quantiles come
+from a uniform row sample and distinct counts from a HyperLogLog sketch;
+top values and memory usage are scaled up from the same sample. Null
+counts, means and extremes stay exact.
+"""
+
+import warnings
+import numpy as np
+import pandas as pd
+
+APPROX_ROWS = 1_000_000
+SAMPLE_SIZE = 100_000
+HLL_PRECISION = 14  # 2**14 registers, about 0.8% standard error
+HLL_CHUNK = 65_536
+
+QUANTILES = [0.25, 0.5, 0.75]
+DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+TOP_VALUES = 5
+MAX_HEATMAP_ROWS = 200
+
+
+def hll_distinct(values, precision=HLL_PRECISION, chunk_size=HLL_CHUNK):
+    """Estimate the number of distinct values (nulls count as one) with HyperLogLog
+
+    Values are hashed a chunk at a time into 2**precision registers, so
+    memory stays fixed however many distinct values the column holds.
+    """
+    values = np.asarray(values, dtype=object)
+    if not len(values):
+        return 0
+    m = 1 << precision
+    registers = np.zeros(m)
+    for start in range(0, len(values), chunk_size):
+        hashes = pd.util.hash_array(values[start:start + chunk_size])
+        index = (hashes >> np.uint64(64 - precision)).astype(np.intp)
+        # Rank = leading zeros + 1 in the next 32 bits (exact in float64)
+        top = ((hashes << np.uint64(precision)) >> np.uint64(32)).astype(np.float64)
+        rank = np.full(len(top), 33.0)
+        nonzero = top > 0
+        rank[nonzero] = 32 - np.floor(np.log2(top[nonzero]))
+        np.maximum.at(registers, index, rank)
+
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(2.0 ** -registers)
+    zeros = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * np.log(m / zeros)  # Linear counting for small cardinalities
+    return int(round(estimate))
+
+
+def _mode(counts):
+    """Smallest of the most frequent values, as Series.mode() picks it"""
+    tied = counts.index[counts.to_numpy() == counts.iloc[0]]
+    try:
+        return sorted(tied)[0]
+    except TypeError:
+        return tied[0]
+
+
+class DataProfile:
+    """Per-column statistics of a DataFrame, computed once"""
+
+    def __init__(self, df, approximate=None, sample_size=SAMPLE_SIZE, seed=0):
+        self.rows, self.width = df.shape
+        self.approximate = self.rows >= APPROX_ROWS if approximate is None else approximate
+        self.columns = list(df.columns)
+        self.dtypes = df.dtypes
+        self.null_counts = df.isna().sum()
+        self.missing_cells = int(self.null_counts.sum())
+
+        self.numeric_columns = list(df.select_dtypes(include=[np.number]).columns)
+        # Object, category and the compact Site Id dtype all have kind 'O'
+        self.categorical_columns = [col for col, dtype in df.dtypes.items() if dtype.kind == 'O']
+
+        sample = df
+        if self.approximate and self.rows > sample_size:
+            rng = np.random.default_rng(seed)
+            sample = df.iloc[np.sort(rng.choice(self.rows, size=sample_size, replace=False))]
+        # Sizing every string is as slow as the rest of the profile; scale the sample's
+        self.scale = self.rows / len(sample) if len(sample) else 1.0
+        self.memory_bytes = int(sample.memory_usage(deep=True).sum() * self.scale)
+
+        self._profile_numeric(df, sample)
+        self._profile_categorical(df, sample)
+
+    def _profile_numeric(self, df, sample):
+        columns = self.numeric_columns
+        values = df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        sampled = sample[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # All-null columns yield NaN
+            quartiles = np.nanquantile(sampled, QUANTILES, axis=0) if sampled.size else \
+                np.full((len(QUANTILES), len(columns)), np.nan)
+            stats = np.vstack([
+                np.count_nonzero(~np.isnan(values), axis=0),
+                np.nanmean(values, axis=0),
+                np.nanstd(values, axis=0, ddof=1),
+                np.nanmin(values, axis=0) if len(values) else np.full(len(columns), np.nan),
+                quartiles,
+                np.nanmax(values, axis=0) if len(values) else np.full(len(columns), np.nan),
+            ])
+        self.numeric = pd.DataFrame(stats, index=DESCRIBE_INDEX, columns=columns)
+
+        iqr = quartiles[2] - quartiles[0]
+        low, high = quartiles[0] - 1.5 * iqr, quartiles[2] + 1.5 * iqr
+        self.outliers = pd.Series(((values < low) | (values > high)).sum(axis=0), index=columns)
+
+    def _profile_categorical(self, df, sample):
+        self.distinct = {}
+        self.top_values = {}
+        self.most_common = {}
+        for col in self.categorical_columns:
+            # Top values come from the sample in approximate mode, scaled to the full sheet
+            counts = sample[col].value_counts()
+            counts = counts[counts > 0]  # Unused categories
+            if self.scale != 1.0:
+                counts = (counts * self.scale).round().astype(int)
+            self.top_values[col] = counts.head(TOP_VALUES)
+            self.most_common[col] = (_mode(counts), int(counts.iloc[0])) if len(counts) else ("N/A", 0)
+
+            if not self.approximate:
+                self.distinct[col] = len(counts)
+            elif isinstance(df[col].dtype, pd.CategoricalDtype):
+                codes = df[col].cat.codes.to_numpy()
+                self.distinct[col] = int(np.count_nonzero(np.bincount(codes[codes >= 0])))
+            else:
+                self.distinct[col] = max(hll_distinct(df[col]) - (self.null_counts[col] > 0), 0)
+
+    @property
+    def completeness(self):
+        """Percentage of non-null cells"""
+        total = self.rows * self.width
+        return (total - self.missing_cells) / total * 100 if total else 100.0
+
+    def describe(self):
+        """Equivalent of select_dtypes(number).describe() on the profiled sheet"""
+        return self.numeric
+
+    def most_missing(self, n=3):
+        return self.null_counts.sort_values(ascending=False).head(n)
+
+
+def missing_blocks(df, max_rows=MAX_HEATMAP_ROWS):
+    """Fraction of missing cells per column over at most max_rows row blocks
+
+    Sheets with max_rows rows or fewer keep one block per row (0 or 1), so
+    the heatmap is exact; larger sheets are split into equal contiguous
+    blocks (the last may be shorter), bounding the rendered cells at
+    max_rows x columns.
+    """
+    mask = df.isna().to_numpy()
+    rows = len(mask)
+    if rows == 0:
+        return pd.DataFrame(np.zeros((0, df.shape[1])), columns=df.columns)
+
+    block_size = -(-rows // max_rows)
+    starts = np.arange(0, rows, block_size)
+    ends = np.minimum(starts + block_size, rows)
+    fractions = np.add.reduceat(mask, starts, axis=0) / (ends - starts)[:, None]
+    labels = starts if rows <= max_rows else [f"{start}-{end - 1}" for start, end in zip(starts, ends)]
+    return pd.DataFrame(fractions, index=labels, columns=df.columns)
@@ -3,94 +3,127 @@ Excel Data Dashboard - Python Version
 A comprehensive dashboard for analyzing Excel data with visualizations
 """
 
-import pandas as pd
+import argparse
+import os
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
+from data_loader import LazyWorkbook
+from profiling import DataProfile, missing_blocks, MAX_HEATMAP_ROWS
 import warnings
 warnings.filterwarnings('ignore')
 
 class ExcelDashboard:
-    def __init__(self, file_path="DB.xlsx"):
-        """Initialize the dashboard with Excel file"""
+    def __init__(self, file_path="DB.xlsx", lazy=True, jobs=1, approximate=None, compact=False):
+        """Initialize the dashboard with Excel file
+
+        lazy: parse the secondary sheets only when first accessed
+        jobs: worker processes used when parsing all sheets up front
+        approximate: sampled / sketched profile (None = automatic for large sheets)
+        compact: hold the sheets in the compact representation (see compact.py)
+        """
         self.file_path = file_path
+        self.lazy = lazy
+        self.jobs = jobs
+        self.approximate = approximate
+        self.compact = compact
         self.data = None
         self.sheets = {}
+        self._profile = None
         
     def load_data(self):
         """Load data from Excel file"""
         try:
-            # Read all sheets
-            excel_file = pd.ExcelFile(self.file_path)
+            # Sheets are parsed from a single open of the workbook
+            self.sheets = LazyWorkbook(self.file_path, compact=self.compact)
+            names = list(self.sheets)
             print(f"📊 Loading data from {self.file_path}")
-            print(f"Found sheets: {excel_file.sheet_names}")
+            print(f"Found sheets: {names}")
             
-            for sheet_name in excel_file.sheet_names:
-                self.sheets[sheet_name] = pd.read_excel(self.file_path, sheet_name=sheet_name)
-                print(f"✅ Loaded sheet '{sheet_name}' with {len(self.sheets[sheet_name])} rows")
+            if not self.lazy:
+                self.sheets.load(jobs=self.jobs)
             
             # Use first sheet as main data
-            self.data = self.sheets[excel_file.sheet_names[0]]
+            self.data = self.sheets[names[0]]
+            self._profile = None
+            for sheet_name in names:
+                if self.sheets.is_loaded(sheet_name):
+                    print(f"✅ Loaded sheet '{sheet_name}' with {len(self.sheets[sheet_name])} rows")
             return True
             
         except Exception as e:
             print(f"❌ Error loading Excel file: {e}")
             return False
     
+    def profile(self):
+        """Per-column statistics of the main sheet, computed once and shared by the reports"""
+        if self._profile is None:
+            self._profile = DataProfile(self.data, approximate=self.approximate)
+        return self._profile
+    
     def display_basic_info(self):
         """Display basic information about the dataset"""
         if self.data is None:
             print("❌ No data loaded")
             return
             
+        profile = self.profile()
         print("\n" + "="*60)
         print("📋 DATASET OVERVIEW")
         print("="*60)
         print(f"Shape: {self.data.shape}")
-        print(f"Columns: {list(self.data.columns)}")
-        print(f"Memory usage: {self.data.memory_usage(deep=True).sum() / 1024:.2f} KB")
+        print(f"Columns: {profile.columns}")
+        print(f"Memory usage: {profile.memory_bytes / 1024:.2f} KB")
+        if profile.approximate:
+            print("ℹ️  Approximate profile: quantiles sampled, unique counts estimated")
         
         print("\n📊 DATA TYPES:")
         print("-" * 30)
-        for col, dtype in self.data.dtypes.items():
-            null_count = self.data[col].isnull().sum()
-            null_pct = (null_count / len(self.data)) * 100
+        for col, dtype in profile.dtypes.items():
+            null_count = profile.null_counts[col]
+            null_pct = (null_count / profile.rows) * 100
             print(f"{col:20} | {str(dtype):10} | Nulls: {null_count:3} ({null_pct:.1f}%)")
         
         print("\n📈 NUMERICAL STATISTICS:")
         print("-" * 50)
-        numeric_data = self.data.select_dtypes(include=[np.number])
-        if not numeric_data.empty:
-            print(numeric_data.describe())
+        if profile.numeric_columns:
+            print(profile.describe())
         else:
             print("No numerical columns found")
             
         print("\n🔤 CATEGORICAL INFO:")
         print("-" * 30)
-        categorical_data = self.data.select_dtypes(include=['object'])
-        for col in categorical_data.columns:
-            unique_count = self.data[col].nunique()
+        for col in profile.categorical_columns:
+            unique_count = profile.distinct[col]
             print(f"{col:20} | Unique values: {unique_count}")
             if unique_count <= 10:
-                print(f"  Values: {list(self.data[col].value_counts().head().index)}")
+                print(f"  Values: {list(profile.top_values[col].index)}")
     
-    def create_visualizations(self):
-        """Create various visualizations"""
+    def create_visualizations(self, output_path=None, max_heatmap_rows=MAX_HEATMAP_ROWS):
+        """Create various visualizations
+
+        output_path: save the figure there instead of opening a window
+        max_heatmap_rows: row blocks drawn in the missing-values heatmap
+        """
         if self.data is None:
             print("❌ No data loaded")
             return
+        # Plotting libraries load on first use; text reports never pay for them
+        import matplotlib.pyplot as plt
+        import seaborn as sns
             
         # Set style
         plt.style.use('seaborn-v0_8')
         fig, axes = plt.subplots(2, 2, figsize=(15, 12))
         fig.suptitle('📊 Data Analysis Dashboard', fontsize=16, fontweight='bold')
         
-        # 1. Missing values heatmap
-        missing_data = self.data.isnull()
-        if missing_data.sum().sum() > 0:
-            sns.heatmap(missing_data, cbar=True, ax=axes[0,0], cmap='viridis')
-            axes[0,0].set_title('🔍 Missing Values Heatmap')
+        # 1. Missing values heatmap (missing fraction per row block on large sheets)
+        if self.profile().missing_cells > 0:
+            missing_data = missing_blocks(self.data, max_heatmap_rows)
+            sns.heatmap(missing_data, cbar=True, ax=axes[0,0], cmap='viridis', vmin=0, vmax=1)
+            if len(self.data) > max_heatmap_rows:
+                axes[0,0].set_title('🔍 Missing Values per Row Block')
+            else:
+                axes[0,0].set_title('🔍 Missing Values Heatmap')
         else:
             axes[0,0].text(0.5, 0.5, 'No Missing Values', ha='center', va='center', transform=axes[0,0].transAxes)
             axes[0,0].set_title('🔍 Missing Values Check')
@@ -117,7 +150,7 @@ class ExcelDashboard:
             axes[1,0].set_title('📊 Data Distribution')
         
         # 4. Top categories (for first categorical column)
-        categorical_data = self.data.select_dtypes(include=['object'])
+        categorical_data = self.data.select_dtypes(include=['object', 'category'])
         if not categorical_data.empty:
             first_categorical = categorical_data.columns[0]
             top_categories = self.data[first_categorical].value_counts().head(10)
@@ -129,7 +162,12 @@ class ExcelDashboard:
             axes[1,1].set_title('🏆 Category Analysis')
         
         plt.tight_layout()
-        plt.show()
+        if output_path:
+            fig.savefig(output_path)
+            plt.close(fig)
+            print(f"🖼️  Visualizations saved to {output_path}")
+        else:
+            plt.show()
     
     def generate_insights(self):
         """Generate automated insights from the data"""
@@ -142,49 +180,39 @@ class ExcelDashboard:
         print("="*60)
         
         # Data quality insights
-        total_cells = self.data.shape[0] * self.data.shape[1]
-        missing_cells = self.data.isnull().sum().sum()
-        completeness = ((total_cells - missing_cells) / total_cells) * 100
+        profile = self.profile()
+        missing_cells = profile.missing_cells
+        completeness = profile.completeness
         
         print(f"📈 Data Completeness: {completeness:.1f}%")
         
         if missing_cells > 0:
             print(f"⚠️  Found {missing_cells} missing values")
-            most_missing = self.data.isnull().sum().sort_values(ascending=False).head(3)
+            most_missing = profile.most_missing(3)
             print(f"   Columns with most missing: {dict(most_missing)}")
         
         # Numerical insights
-        numeric_data = self.data.select_dtypes(include=[np.number])
-        if not numeric_data.empty:
+        if profile.numeric_columns:
             print(f"\n📊 Numerical Analysis:")
-            for col in numeric_data.columns[:3]:  # Top 3 numerical columns
-                mean_val = self.data[col].mean()
-                median_val = self.data[col].median()
-                std_val = self.data[col].std()
+            for col in profile.numeric_columns[:3]:  # Top 3 numerical columns
+                stats = profile.numeric[col]
                 
                 print(f"   {col}:")
-                print(f"     Mean: {mean_val:.2f}, Median: {median_val:.2f}")
-                print(f"     Standard Deviation: {std_val:.2f}")
+                print(f"     Mean: {stats['mean']:.2f}, Median: {stats['50%']:.2f}")
+                print(f"     Standard Deviation: {stats['std']:.2f}")
                 
-                # Detect outliers
-                Q1 = self.data[col].quantile(0.25)
-                Q3 = self.data[col].quantile(0.75)
-                IQR = Q3 - Q1
-                outliers = self.data[(self.data[col] < Q1 - 1.5*IQR) | (self.data[col] > Q3 + 1.5*IQR)]
-                if len(outliers) > 0:
-                    print(f"     ⚠️  Detected {len(outliers)} potential outliers")
+                # Outliers beyond 1.5 IQR of the quartiles
+                if profile.outliers[col] > 0:
+                    print(f"     ⚠️  Detected {profile.outliers[col]} potential outliers")
         
         # Categorical insights
-        categorical_data = self.data.select_dtypes(include=['object'])
-        if not categorical_data.empty:
+        if profile.categorical_columns:
             print(f"\n🔤 Categorical Analysis:")
-            for col in categorical_data.columns[:3]:  # Top 3 categorical columns
-                unique_count = self.data[col].nunique()
-                most_common = self.data[col].mode().iloc[0] if not self.data[col].mode().empty else "N/A"
-                most_common_count = self.data[col].value_counts().iloc[0] if not self.data[col].value_counts().empty else 0
+            for col in profile.categorical_columns[:3]:  # Top 3 categorical columns
+                most_common, most_common_count = profile.most_common[col]
                 
                 print(f"   {col}:")
-                print(f"     Unique values: {unique_count}")
+                print(f"     Unique values: {profile.distinct[col]}")
                 print(f"     Most common: '{most_common}' ({most_common_count} occurrences)")
     
     def export_summary(self, filename="data_summary.txt"):
@@ -199,26 +227,30 @@ class ExcelDashboard:
             f.write(f"Source file: {self.file_path}\n")
             f.write("="*60 + "\n\n")
             
+            profile = self.profile()
             f.write(f"Dataset Shape: {self.data.shape}\n")
-            f.write(f"Columns: {', '.join(self.data.columns)}\n\n")
+            f.write(f"Columns: {', '.join(profile.columns)}\n\n")
             
             f.write("Column Information:\n")
             f.write("-" * 30 + "\n")
-            for col, dtype in self.data.dtypes.items():
-                null_count = self.data[col].isnull().sum()
+            for col, dtype in profile.dtypes.items():
+                null_count = profile.null_counts[col]
                 f.write(f"{col}: {dtype} (Missing: {null_count})\n")
             
             # Add numerical statistics
-            numeric_data = self.data.select_dtypes(include=[np.number])
-            if not numeric_data.empty:
+            if profile.numeric_columns:
                 f.write(f"\nNumerical Statistics:\n")
                 f.write("-" * 30 + "\n")
-                f.write(str(numeric_data.describe()))
+                f.write(str(profile.describe()))
         
         print(f"📄 Summary exported to {filename}")
     
-    def run_dashboard(self):
-        """Run the complete dashboard analysis"""
+    def run_dashboard(self, output_dir=None):
+        """Run the complete dashboard analysis
+
+        With output_dir the run is headless: no prompts, and the figure and
+        summary are written to that directory.
+        """
         print("🚀 Starting Excel Data Dashboard Analysis...")
         
         if not self.load_data():
@@ -227,6 +259,15 @@ class ExcelDashboard:
         self.display_basic_info()
         self.generate_insights()
         
+        if output_dir:
+            import matplotlib
+            matplotlib.use('Agg')
+            os.makedirs(output_dir, exist_ok=True)
+            self.create_visualizations(os.path.join(output_dir, "dashboard.png"))
+            self.export_summary(os.path.join(output_dir, "data_summary.txt"))
+            print("\n✅ Dashboard analysis complete!")
+            return
+        
         # Ask user if they want visualizations
         try:
             show_viz = input("\n📊 Generate visualizations? (y/n): ").lower()
@@ -246,6 +287,13 @@ class ExcelDashboard:
         print("\n✅ Dashboard analysis complete!")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Excel Data Dashboard")
+    parser.add_argument("file_path", nargs="?", default="DB.xlsx")
+    parser.add_argument("--output-dir", help="Render headless and write the figure and summary here")
+    parser.add_argument("--compact", action="store_true",
+                        help="Categorical text and parsed Site Ids; less memory for large sheets")
+    args = parser.parse_args()
+
     # Create and run dashboard
-    dashboard = ExcelDashboard("DB.xlsx")
-    dashboard.run_dashboard()
\ No newline at end of file
+    dashboard = ExcelDashboard(args.file_path, compact=args.compact)
+    dashboard.run_dashboard(output_dir=args.output_dir)
\ No newline at end of file
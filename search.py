@@ -0,0 +1,190 @@
+"""
+Free-Text Search Index
+Inverted index over the History / Reason / Summarised (DB.xlsx) and
+History | Issue (device and events sheets) columns, built when a workbook
+is ingested.
+
+The text columns repeat a small set of phrases ("RMS faulty submitted for
+R&R", "Visit Required"), so the index is built over distinct cell values:
+each value is tokenized once, tokens point to the values holding them
+(phrases are checked against the value's token list) and each value
+points to the rows holding it. Term, phrase and prefix
+lookups touch only the vocabulary; rows are gathered at the end and
+filtered by Sub Region / Aging / Domain through integer codes. Tokens of
+values already seen by the previous version of the workbook are reused,
+so re-indexing a changed export only tokenizes new text.
+
+Query syntax: words are ANDed terms, "double quotes" make a phrase and a
+trailing * a prefix, e.g.  "ecm swapped" r&r data*
+"""
+
+import bisect
+import re
+import numpy as np
+import pandas as pd
+from column_l import classify_codes, CATEGORIES
+
+TEXT_COLUMNS = ['History', 'Reason', 'Summarised', 'History | Issue']
+REASON_COLUMNS = ['Summarised', 'Summarize']  # Short reason category per row
+FILTER_COLUMNS = ['Sub Region', 'Aging', 'Domain']
+
+TOP_CATEGORIES = 10
+MAX_CACHED_TERMS = 4096  # Row postings kept per index
+
+_TOKEN = re.compile(r"[0-9a-z]+(?:[&'.][0-9a-z]+)*")
+_QUERY = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text):
+    """Lower-case word tokens; R&R, ES2-SUK-01527 -> r&r, es2 suk 01527"""
+    return tuple(_TOKEN.findall(str(text).lower()))
+
+
+def parse_query(query):
+    """Split a query into (kind, tokens) clauses: 'term', 'phrase' or 'prefix'"""
+    clauses = []
+    for phrase, word in _QUERY.findall(query):
+        if phrase:
+            tokens = tokenize(phrase)
+            if len(tokens) == 1:
+                clauses.append(('term', tokens))
+            elif tokens:
+                clauses.append(('phrase', tokens))
+        elif word.endswith('*') and tokenize(word[:-1]):
+            clauses.append(('prefix', tokenize(word[:-1])[:1]))
+        else:
+            clauses.extend(('term', (token,)) for token in tokenize(word))
+    return clauses
+
+
+def _codes(series):
+    """(codes, labels) for a filter or category column; Domain rolls up like Column L"""
+    if series.name == 'Domain':
+        return classify_codes(series).astype(np.intp), list(CATEGORIES)
+    codes, uniques = pd.factorize(series.astype(object), sort=True)
+    return codes, [str(value) for value in uniques]
+
+
+class TextIndex:
+    """Token -> distinct text values -> rows, over the sheet's free-text columns"""
+
+    def __init__(self, df, previous=None):
+        self.columns = [col for col in TEXT_COLUMNS if col in df.columns]
+        if not self.columns:
+            raise ValueError(f"None of the text columns {TEXT_COLUMNS} are present in the sheet")
+        self.rows = len(df)
+        # Tokens per distinct text; the previous version's are reused
+        seen = previous._tokens if previous is not None else {}
+        self._tokens = {}
+
+        # A document is one distinct value of one text column
+        self.doc_column, self.doc_tokens, doc_rows = [], [], []
+        for col in self.columns:
+            codes, uniques = pd.factorize(df[col].astype(object))
+            order = np.argsort(codes, kind='stable').astype(np.int32)
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            ends = np.cumsum(counts) + np.count_nonzero(codes < 0)  # Blanks sort first
+            for value, start, end in zip(uniques, ends - counts, ends):
+                tokens = self._tokens.get(value) or seen.get(value)
+                if tokens is None:
+                    tokens = tokenize(value)
+                self._tokens[value] = tokens
+                self.doc_column.append(col)
+                self.doc_tokens.append(tokens)
+                doc_rows.append(order[start:end])
+        self.doc_rows = doc_rows
+
+        postings = {}
+        for doc, tokens in enumerate(self.doc_tokens):
+            for token in set(tokens):
+                postings.setdefault(token, []).append(doc)
+        self.postings = {token: np.array(docs, dtype=np.int32) for token, docs in postings.items()}
+        self.vocabulary = sorted(self.postings)
+
+        self.filters = {col: _codes(df[col]) for col in FILTER_COLUMNS if col in df.columns}
+        reason = next((col for col in REASON_COLUMNS if col in df.columns), None)
+        self.reason_column = reason
+        self.reasons = _codes(df[reason]) if reason else None
+        self._term_rows = {}
+
+    def __len__(self):
+        return len(self.vocabulary)
+
+    def _rows(self, docs):
+        if not len(docs):
+            return np.array([], dtype=np.int32)
+        if len(docs) == 1:
+            return self.doc_rows[docs[0]]
+        return np.unique(np.concatenate([self.doc_rows[doc] for doc in docs]))
+
+    def _docs(self, kind, tokens):
+        if kind == 'term':
+            return self.postings.get(tokens[0], np.array([], dtype=np.int32))
+        if kind == 'prefix':
+            start = bisect.bisect_left(self.vocabulary, tokens[0])
+            end = bisect.bisect_left(self.vocabulary, tokens[0] + '\uffff')
+            found = [self.postings[token] for token in self.vocabulary[start:end]]
+            return np.unique(np.concatenate(found)) if found else np.array([], dtype=np.int32)
+        # Phrase: documents holding every token, then a positional check on their token lists
+        docs = self.postings.get(tokens[0], np.array([], dtype=np.int32))
+        for token in tokens[1:]:
+            docs = np.intersect1d(docs, self.postings.get(token, []), assume_unique=True)
+        n = len(tokens)
+        return np.array([doc for doc in docs
+                         if any(self.doc_tokens[doc][i:i + n] == tokens
+                                for i in range(len(self.doc_tokens[doc]) - n + 1))], dtype=np.int32)
+
+    def _clause_rows(self, kind, tokens, columns):
+        key = (kind, tokens, columns)
+        rows = self._term_rows.get(key)
+        if rows is None:
+            docs = self._docs(kind, tokens)
+            if columns is not None:
+                docs = [doc for doc in docs if self.doc_column[doc] in columns]
+            rows = self._rows(docs)
+            if len(self._term_rows) >= MAX_CACHED_TERMS:
+                self._term_rows.clear()
+            self._term_rows[key] = rows
+        return rows
+
+    def search(self, query, filters=None, columns=None):
+        """Sorted row positions matching every clause of the query and the filters
+
+        filters maps Sub Region / Aging / Domain to a value or list of values;
+        columns restricts matching to some of the text columns.
+        """
+        columns = tuple(columns) if columns else None
+        unknown = [col for col in columns or () if col not in self.columns]
+        if unknown:
+            raise KeyError(f"Unknown text columns: {unknown}")
+        clauses = parse_query(query)
+        if not clauses:
+            return np.array([], dtype=np.int32)
+        # Rarest clause first keeps the intersections small
+        matched = sorted((self._clause_rows(kind, tokens, columns) for kind, tokens in clauses), key=len)
+        rows = matched[0]
+        for other in matched[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return self.filter(rows, filters)
+
+    def filter(self, rows, filters=None):
+        for col, values in (filters or {}).items():
+            if col not in self.filters:
+                raise KeyError(f"Unknown filter: {col}")
+            codes, labels = self.filters[col]
+            values = [values] if isinstance(values, str) else values
+            # Lookup table over the codes; the extra last slot catches blanks (-1)
+            wanted = np.zeros(len(labels) + 1, dtype=bool)
+            wanted[[labels.index(value) for value in values if value in labels]] = True
+            rows = rows[wanted[codes[rows]]]
+        return rows
+
+    def categories(self, rows, top=TOP_CATEGORIES):
+        """Most frequent reason categories among the rows: [(category, count), ...]"""
+        if self.reasons is None or not len(rows):
+            return []
+        codes, labels = self.reasons
+        codes = codes[rows]
+        counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+        best = np.argsort(-counts, kind='stable')[:top]
+        return [(labels[i], int(counts[i])) for i in best if counts[i]]
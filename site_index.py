@@ -0,0 +1,239 @@
+"""
+Cross-Workbook Site Index
+Hash index from Site Id, and from its cluster code (SUK in ES2-SUK-01527),
+to row offsets in every workbook the data service holds. Single-site
+lookups are dict hits; the per-site joined table is built once per set of
+workbook versions with one aligned concat.
+"""
+
+import hashlib
+import os
+import threading
+import numpy as np
+import pandas as pd
+from flask import Blueprint, jsonify, request
+from data_service import data_service, cached_json, to_records
+
+SITE_ID_COLUMN = 'Site Id'
+
+# Columns carried into the joined table, per dataset (when present)
+JOIN_COLUMNS = {
+    'db': ['Sub Region', 'Cluster', 'Device Brand', 'Offline Date', 'Aging', 'Reason', 'Domain'],
+    'spd': ['Beginning', 'Aging', 'Alarm'],
+    'rectifier': ['Beginning', 'Aging', 'Alarm'],
+    'rectifier_fan': ['Beginning', 'Aging', 'Alarm'],
+    'dse': ['Beginning', 'Aging', 'Alarm'],
+    'events': ['Beginning', 'Aging', 'Alarm'],
+    'tenant': ['Operator'],
+    'locations': ['Sub Region', 'Region', 'Latitude', 'TL', 'ES POC'],
+}
+
+MULTI_VALUE_SEPARATOR = ' | '
+
+
+def normalize_site_id(value):
+    return str(value).strip().upper()
+
+
+def cluster_code(site_id):
+    """Cluster code of a Site Id: ES2-SUK-01527 -> SUK"""
+    parts = site_id.split('-')
+    return parts[1] if len(parts) >= 3 else None
+
+
+def _site_ids(df):
+    ids = df[SITE_ID_COLUMN]
+    ids = ids[ids.notna()].astype(str).str.strip().str.upper()
+    return ids[ids != '']
+
+
+def _group(keys):
+    """Sort-based grouping: (unique keys, start, end, order) so group i is order[start[i]:end[i]]"""
+    codes, uniques = pd.factorize(keys)
+    order = np.argsort(codes, kind='stable')
+    ends = np.cumsum(np.bincount(codes, minlength=len(uniques)))
+    return uniques, ends - np.bincount(codes, minlength=len(uniques)), ends, order
+
+
+def _join_values(keys, values):
+    """Distinct non-blank values per key joined into one string"""
+    pairs = pd.DataFrame({'key': keys, 'value': values}).dropna().drop_duplicates()
+    uniques, starts, ends, order = _group(pairs['key'].to_numpy())
+    strings = pairs['value'].astype(str).to_numpy()[order]
+    return pd.Series([MULTI_VALUE_SEPARATOR.join(strings[a:b]) for a, b in zip(starts, ends)],
+                     index=uniques, dtype=object)
+
+
+def _per_site(name, df, ids):
+    """One row per Site Id: row count plus the dataset's join columns"""
+    columns = [col for col in JOIN_COLUMNS.get(name, []) if col in df.columns]
+    rows = df.loc[ids.index, columns]
+    keys = ids.to_numpy()
+    if ids.is_unique:
+        per_site = rows.set_axis(keys)
+        per_site.insert(0, 'rows', 1)
+    else:
+        # Sites listed more than once (events, tenant operators) keep every distinct value
+        counts = ids.value_counts(sort=False)
+        per_site = pd.DataFrame({col: _join_values(keys, rows[col].to_numpy()) for col in columns},
+                                index=counts.index)
+        per_site.insert(0, 'rows', counts)
+    return per_site.add_prefix(f"{name}.")
+
+
+class SiteIndex:
+    """Site Id -> {dataset: row offsets} over a set of loaded sheets"""
+
+    def __init__(self, frames):
+        self.frames = {name: df for name, df in frames.items() if SITE_ID_COLUMN in df.columns}
+        self.offsets = {}
+        self._ids = {}
+        for name, df in self.frames.items():
+            ids = _site_ids(df)
+            self._ids[name] = ids
+            positions = df.index.get_indexer(ids.index)
+            uniques, starts, ends, order = _group(ids.to_numpy())
+            positions = positions[order]
+            for site_id, start, end in zip(uniques, starts, ends):
+                self.offsets.setdefault(site_id, {})[name] = positions[start:end]
+
+        self.clusters = {}
+        for site_id in sorted(self.offsets):
+            self.clusters.setdefault(cluster_code(site_id), []).append(site_id)
+
+        self._joined = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, site_id):
+        return normalize_site_id(site_id) in self.offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def sites(self, cluster=None):
+        if cluster is None:
+            return sorted(self.offsets)
+        return list(self.clusters.get(cluster.strip().upper(), []))
+
+    def lookup(self, site_id):
+        """Rows for one site in every dataset: {dataset: DataFrame}"""
+        offsets = self.offsets.get(normalize_site_id(site_id), {})
+        return {name: self.frames[name].iloc[rows] for name, rows in offsets.items()}
+
+    @property
+    def joined(self):
+        """One row per Site Id with every dataset's join columns side by side"""
+        if self._joined is None:
+            with self._lock:
+                if self._joined is None:
+                    parts = [_per_site(name, df, self._ids[name]) for name, df in self.frames.items()]
+                    joined = pd.concat(parts, axis=1, join='outer', sort=True) if parts else pd.DataFrame()
+                    joined.index.name = SITE_ID_COLUMN
+                    joined.insert(0, 'Cluster Code', [cluster_code(site_id) for site_id in joined.index])
+                    for col in [c for c in joined.columns if c.endswith('.rows')]:
+                        joined[col] = joined[col].fillna(0).astype(np.int64)
+                    self._joined = joined
+        return self._joined
+
+    def join(self, site_ids=None, cluster=None, datasets=None):
+        """Slice of the joined table by Site Ids and/or cluster code, limited to some datasets"""
+        joined = self.joined
+        if site_ids is not None or cluster is not None:
+            # Rows are picked through the hash index rather than by scanning the table
+            wanted = self.sites(cluster) if site_ids is None else \
+                [site_id for site_id in dict.fromkeys(map(normalize_site_id, site_ids)) if site_id in self.offsets]
+            if site_ids is not None and cluster is not None:
+                wanted = [site_id for site_id in wanted if cluster_code(site_id) == cluster.strip().upper()]
+            joined = joined.loc[wanted]
+        if datasets is not None:
+            prefixes = tuple(f"{name}." for name in datasets)
+            joined = joined[['Cluster Code'] + [c for c in joined.columns if c.startswith(prefixes)]]
+        return joined
+
+
+_state = {'versions': None, 'index': None, 'etag': None, 'responses': {}}
+_state_lock = threading.Lock()
+
+
+def site_index(service=data_service):
+    """The index over every available dataset, rebuilt only when a workbook changes"""
+    entries = {name: service.get(name) for name in service.datasets if os.path.exists(service.path(name))}
+    versions = tuple(sorted((name, entry['version']) for name, entry in entries.items()))
+    if _state['versions'] != versions:
+        with _state_lock:
+            if _state['versions'] != versions:
+                _state.update(
+                    index=SiteIndex({name: entry['data'] for name, entry in entries.items()}),
+                    etag=hashlib.sha1(repr(versions).encode('utf-8')).hexdigest()[:16],
+                    responses={},
+                    versions=versions,
+                )
+    return _state
+
+
+sites_api = Blueprint('sites', __name__, url_prefix='/api/sites')
+
+
+def _csv_arg(name):
+    values = [value for value in request.args.get(name, '').split(',') if value.strip()]
+    return tuple(values) if values else None
+
+
+@sites_api.route('')
+def list_sites():
+    """Site Ids with their row count per dataset, e.g. /api/sites?cluster=SUK"""
+    state = site_index()
+    index = state['index']
+    cluster = request.args.get('cluster')
+
+    def build():
+        sites = [{'site_id': site_id,
+                  'datasets': {name: len(rows) for name, rows in index.offsets[site_id].items()}}
+                 for site_id in index.sites(cluster)]
+        return {'cluster': cluster, 'count': len(sites), 'sites': sites}
+
+    return cached_json(state, ('sites', cluster), build)
+
+
+@sites_api.route('/joined', methods=['GET', 'POST'])
+def joined():
+    """Per-site joined table across workbooks
+
+    Filter with ?cluster=SUK, ?site_ids=ES2-SUK-01527,... (or a JSON body
+    {"site_ids": [...]} on POST) and ?datasets=db,spd.
+    """
+    state = site_index()
+    site_ids = _csv_arg('site_ids')
+    if request.method == 'POST':
+        body = request.get_json(silent=True) or {}
+        posted = body.get('site_ids') if isinstance(body, dict) else body
+        if posted is not None and (not isinstance(posted, list) or
+                                   any(isinstance(value, (list, dict)) or value is None for value in posted)):
+            return jsonify({'error': 'Body must be {"site_ids": [Site Id, ...]}'}), 400
+        site_ids = tuple(str(value) for value in posted or ()) or site_ids
+    cluster = request.args.get('cluster')
+    datasets = _csv_arg('datasets')
+    unknown = [name for name in datasets or () if name not in data_service.datasets]
+    if unknown:
+        return jsonify({'error': f'Unknown datasets: {unknown}'}), 404
+
+    def build():
+        table = state['index'].join(site_ids=site_ids, cluster=cluster, datasets=datasets)
+        return {'count': len(table), 'rows': to_records(table.reset_index())}
+
+    return cached_json(state, ('joined', site_ids, cluster, datasets), build)
+
+
+@sites_api.route('/<site_id>')
+def site(site_id):
+    """Every row for one site in every workbook, e.g. /api/sites/ES2-KKO-05047"""
+    state = site_index()
+    index = state['index']
+    if site_id not in index:
+        return jsonify({'error': f'Site not found: {site_id}'}), 404
+    site_id = normalize_site_id(site_id)
+    return cached_json(state, ('site', site_id), lambda: {
+        'site_id': site_id,
+        'cluster_code': cluster_code(site_id),
+        'datasets': {name: to_records(rows) for name, rows in index.lookup(site_id).items()},
+    })
@@ -0,0 +1,255 @@
+"""
+Site Spatial Index
+Uniform lat/long grid over the site coordinates in Locations.xlsx (and
+tenant.xlsx for sites missing there), answering bounding-box, nearest-site
+and zoom-level cluster queries so the Leaflet maps receive only what is
+visible. Each point carries its offline / alarm status from the site index.
+"""
+
+import hashlib
+import math
+import threading
+import numpy as np
+import pandas as pd
+from flask import Blueprint, jsonify, request
+from data_service import cached_json
+from site_index import site_index, SITE_ID_COLUMN
+
+COORDINATE_COLUMN = 'Latitude'  # Holds "lat   long" in one cell
+COORDINATE_SOURCES = ['locations', 'tenant']  # First source wins for a site
+ALARM_DATASETS = ['spd', 'rectifier', 'rectifier_fan', 'dse', 'events']
+
+# A site is offline while its DB.xlsx row has an Offline Date
+OFFLINE_DATASET = 'db'
+OFFLINE_COLUMN = 'Offline Date'
+
+GRID_CELL_DEGREES = 0.05
+MAX_CELLS_SCANNED = 10_000  # Above this a bbox query filters all points directly
+CLUSTER_CELLS_PER_TILE = 4  # Cluster cell = a quarter of a 256 px map tile
+MAX_SITES = 5000
+EARTH_RADIUS_KM = 6371.0
+
+_COORDINATES = r'^\s*(-?\d+(?:\.\d+)?)°?[\s,]+(-?\d+(?:\.\d+)?)°?\s*$'
+
+
+def parse_coordinates(values):
+    """Split 'lat   long' strings into float arrays (NaN where unparseable)"""
+    parts = pd.Series(values, dtype=object).astype(str).str.extract(_COORDINATES)
+    return parts[0].astype(float).to_numpy(), parts[1].astype(float).to_numpy()
+
+
+def haversine_km(lat, lon, lat2, lon2):
+    lat, lon, lat2, lon2 = map(np.radians, (lat, lon, lat2, lon2))
+    a = np.sin((lat2 - lat) / 2) ** 2 + np.cos(lat) * np.cos(lat2) * np.sin((lon2 - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class GridIndex:
+    """Points bucketed into fixed-size lat/long cells, stored sorted by cell"""
+
+    def __init__(self, points, cell=GRID_CELL_DEGREES):
+        """points: DataFrame with lat and lon columns (plus any attributes)"""
+        self.cell = cell
+        rows = np.floor(points['lat'].to_numpy() / cell).astype(np.int64)
+        cols = np.floor(points['lon'].to_numpy() / cell).astype(np.int64)
+        order = np.lexsort((cols, rows))
+        self.points = points.iloc[order].reset_index(drop=True)
+        self.lat = self.points['lat'].to_numpy()
+        self.lon = self.points['lon'].to_numpy()
+
+        keys = list(zip(rows[order].tolist(), cols[order].tolist()))
+        self.cells = {}
+        for i, key in enumerate(keys):
+            start, _ = self.cells.get(key, (i, i))
+            self.cells[key] = (start, i + 1)
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cell_range(self, low, high):
+        return range(int(np.floor(low / self.cell)), int(np.floor(high / self.cell)) + 1)
+
+    def bbox(self, west, south, east, north):
+        """Positions of the points inside the box"""
+        rows, cols = self._cell_range(south, north), self._cell_range(west, east)
+        if len(rows) * len(cols) > min(MAX_CELLS_SCANNED, len(self.cells) * 4):
+            candidates = np.arange(len(self.points))
+        else:
+            spans = [self.cells[(r, c)] for r in rows for c in cols if (r, c) in self.cells]
+            if not spans:
+                return np.array([], dtype=np.intp)
+            candidates = np.concatenate([np.arange(start, end) for start, end in spans])
+        lat, lon = self.lat[candidates], self.lon[candidates]
+        inside = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+        return candidates[inside]
+
+    def nearest(self, lat, lon, k=1):
+        """(positions, distances in km) of the k closest points, searching outward ring by ring"""
+        if not len(self.points):
+            return np.array([], dtype=np.intp), np.array([])
+        k = min(k, len(self.points))
+        row, col = int(np.floor(lat / self.cell)), int(np.floor(lon / self.cell))
+        found = []
+        ring = 0
+        # Stop widening once the rings cover more cells than a full scan would touch
+        while (2 * ring + 1) ** 2 <= max(len(self.cells) * 4, 9):
+            for r in range(row - ring, row + ring + 1):
+                for c in range(col - ring, col + ring + 1):
+                    if max(abs(r - row), abs(c - col)) == ring and (r, c) in self.cells:
+                        found.extend(range(*self.cells[(r, c)]))
+            if len(found) >= k:
+                candidates = np.array(found)
+                distances = haversine_km(lat, lon, self.lat[candidates], self.lon[candidates])
+                best = np.argsort(distances)[:k]
+                # Unsearched points are at least `ring` cells away east-west, the
+                # shorter direction, measured at the widest latitude searched
+                widest = np.radians(min(abs(lat) + ring * self.cell, 89.9))
+                if distances[best[-1]] <= np.radians(ring * self.cell) * EARTH_RADIUS_KM * np.cos(widest):
+                    return candidates[best], distances[best]
+            ring += 1
+        candidates = np.arange(len(self.points))
+        distances = haversine_km(lat, lon, self.lat, self.lon)
+        best = np.argsort(distances)[:k]
+        return candidates[best], distances[best]
+
+    def clusters(self, positions, zoom):
+        """Aggregate points into zoom-dependent cells: one marker per non-empty cell"""
+        size = 360.0 / (2 ** zoom) / CLUSTER_CELLS_PER_TILE
+        points = self.points.iloc[positions]
+        keys = (np.floor(points['lat'].to_numpy() / size).astype(np.int64) * 1_000_000 +
+                np.floor(points['lon'].to_numpy() / size).astype(np.int64))
+        grouped = points.groupby(keys, sort=False)
+        markers = grouped.agg(lat=('lat', 'mean'), lon=('lon', 'mean'), count=('site_id', 'size'),
+                              offline=('offline', 'sum'), alarms=('alarms', 'sum'),
+                              site_id=('site_id', 'first'))
+        markers.loc[markers['count'] > 1, 'site_id'] = None
+        return markers.reset_index(drop=True)
+
+
+def site_points(index):
+    """One coordinate row per site with its status from the site index"""
+    frames = []
+    for name in COORDINATE_SOURCES:
+        df = index.frames.get(name)
+        if df is None or COORDINATE_COLUMN not in df.columns:
+            continue
+        lat, lon = parse_coordinates(df[COORDINATE_COLUMN])
+        frames.append(pd.DataFrame({
+            'site_id': df[SITE_ID_COLUMN].astype(str).str.strip().str.upper().to_numpy(),
+            'lat': lat, 'lon': lon,
+            'sub_region': df['Sub Region'].to_numpy() if 'Sub Region' in df.columns else None,
+        }))
+    if not frames:
+        return pd.DataFrame(columns=['site_id', 'lat', 'lon', 'sub_region', 'offline', 'alarms'])
+
+    points = pd.concat(frames, ignore_index=True).dropna(subset=['lat', 'lon'])
+    points = points.drop_duplicates('site_id').reset_index(drop=True)
+    offline = set()
+    db = index.frames.get(OFFLINE_DATASET)
+    if db is not None and OFFLINE_COLUMN in db.columns:
+        offline = set(db.loc[db[OFFLINE_COLUMN].notna(), SITE_ID_COLUMN].astype(str).str.strip().str.upper())
+    offsets = [index.offsets.get(site_id, {}) for site_id in points['site_id']]
+    points['offline'] = points['site_id'].isin(offline).astype(int)
+    points['alarms'] = [sum(len(found.get(name, ())) for name in ALARM_DATASETS) for found in offsets]
+    return points
+
+
+_state = {'versions': None, 'grid': None, 'etag': None, 'responses': {}}
+_state_lock = threading.Lock()
+
+
+def spatial_index():
+    """The grid over the current site coordinates, rebuilt with the site index"""
+    sites = site_index()
+    if _state['versions'] != sites['versions']:
+        with _state_lock:
+            if _state['versions'] != sites['versions']:
+                _state.update(
+                    grid=GridIndex(site_points(sites['index'])),
+                    etag=hashlib.sha1(repr(('map', sites['versions'])).encode('utf-8')).hexdigest()[:16],
+                    responses={},
+                    versions=sites['versions'],
+                )
+    return _state
+
+
+map_api = Blueprint('map', __name__, url_prefix='/api/map')
+
+
+def _coordinate(value, limit):
+    """A latitude (limit 90) or longitude (limit 180); ValueError for nan, inf or out of range"""
+    value = float(value)
+    if not math.isfinite(value) or abs(value) > limit:
+        raise ValueError(f"Coordinate {value} outside ±{limit}")
+    return value
+
+
+def _bbox_arg():
+    """Leaflet's map.getBounds().toBBoxString(): west,south,east,north"""
+    west, south, east, north = request.args['bbox'].split(',')
+    return _coordinate(west, 180), _coordinate(south, 90), _coordinate(east, 180), _coordinate(north, 90)
+
+
+def _marker_records(df):
+    out = df.astype(object).where(df.notna(), None)
+    return out.to_dict(orient='records')
+
+
+@map_api.route('/sites')
+def sites_in_bbox():
+    """Sites inside ?bbox=west,south,east,north with their status (at most ?limit=)"""
+    state = spatial_index()
+    try:
+        bbox = _bbox_arg() if 'bbox' in request.args else (-180.0, -90.0, 180.0, 90.0)
+        limit = min(int(request.args.get('limit', MAX_SITES)), MAX_SITES)
+    except ValueError:
+        return jsonify({'error': 'bbox must be west,south,east,north within ±180 / ±90 and limit an integer'}), 400
+
+    def build():
+        positions = state['grid'].bbox(*bbox)
+        sites = state['grid'].points.iloc[positions[:limit]]
+        return {'bbox': bbox, 'count': len(positions), 'truncated': len(positions) > limit,
+                'sites': _marker_records(sites)}
+
+    return cached_json(state, ('sites', bbox, limit), build)
+
+
+@map_api.route('/nearest')
+def nearest():
+    """The ?k= (default 1) sites closest to ?lat=&lon=, with distances in km"""
+    state = spatial_index()
+    try:
+        lat, lon = _coordinate(request.args['lat'], 90), _coordinate(request.args['lon'], 180)
+        k = max(1, min(int(request.args.get('k', 1)), 100))
+    except (KeyError, ValueError):
+        return jsonify({'error': 'lat (±90) and lon (±180) are required numbers; k is an integer'}), 400
+
+    def build():
+        positions, distances = state['grid'].nearest(lat, lon, k)
+        sites = state['grid'].points.iloc[positions].assign(distance_km=np.round(distances, 3))
+        return {'lat': lat, 'lon': lon, 'sites': _marker_records(sites)}
+
+    return cached_json(state, ('nearest', lat, lon, k), build)
+
+
+@map_api.route('/clusters')
+def clusters():
+    """Clustered markers for ?bbox=west,south,east,north at ?zoom= (Leaflet zoom level)
+
+    Each marker has the member count, centroid, offline site count and
+    alarm row count; single-site markers also carry the site_id.
+    """
+    state = spatial_index()
+    try:
+        bbox = _bbox_arg()
+        zoom = max(0, min(int(request.args.get('zoom', 8)), 22))
+    except (KeyError, ValueError):
+        return jsonify({'error': 'bbox=west,south,east,north within ±180 / ±90 and an integer zoom are required'}), 400
+
+    def build():
+        grid = state['grid']
+        markers = grid.clusters(grid.bbox(*bbox), zoom)
+        return {'bbox': bbox, 'zoom': zoom, 'sites': int(markers['count'].sum()) if len(markers) else 0,
+                'markers': _marker_records(markers)}
+
+    return cached_json(state, ('clusters', bbox, zoom), build)
@@ -0,0 +1,162 @@
+"""
+Workbook Watcher
+Polls the RMS workbooks for changes, re-ingests only the workbook that
+changed and pushes the per-site diff to dashboards over Server-Sent Events.
+"""
+
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+import pandas as pd
+from flask import Blueprint, Response, stream_with_context
+from data_service import data_service, to_records
+from workbook_cache import file_key
+
+WATCH_INTERVAL = float(os.environ.get('RMS_WATCH_INTERVAL', 2))
+HEARTBEAT_SECONDS = 15
+SITE_ID_COLUMN = 'Site Id'
+
+# Recomputed by Excel on every export, so never a meaningful change on its own
+VOLATILE_COLUMNS = ['Days Passed']
+
+
+def site_hashes(df):
+    """One order-independent hash per Site Id over all of that site's rows"""
+    if SITE_ID_COLUMN not in df.columns:
+        return pd.Series(dtype='uint64')
+    stable = df.drop(columns=[c for c in VOLATILE_COLUMNS if c in df.columns])
+    row_hashes = pd.util.hash_pandas_object(stable, index=False)
+    return row_hashes.groupby(df[SITE_ID_COLUMN].to_numpy()).sum()
+
+
+def diff_sites(old_df, new_df):
+    """Return added, removed and changed sites between two versions of a sheet"""
+    old_hashes = site_hashes(old_df)
+    new_hashes = site_hashes(new_df)
+
+    added = new_hashes.index.difference(old_hashes.index)
+    removed = old_hashes.index.difference(new_hashes.index)
+    common = new_hashes.index.intersection(old_hashes.index)
+    changed = common[new_hashes[common].to_numpy() != old_hashes[common].to_numpy()]
+
+    site_ids = new_df[SITE_ID_COLUMN] if SITE_ID_COLUMN in new_df.columns else pd.Series(dtype=object)
+    return {
+        'added': to_records(new_df[site_ids.isin(added)]),
+        'removed': [str(site_id) for site_id in removed],
+        'changed': to_records(new_df[site_ids.isin(changed)]),
+    }
+
+
+class EventBroker:
+    """Fan-out of change events to every connected SSE client"""
+
+    def __init__(self, max_queued=100):
+        self.max_queued = max_queued
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.max_queued)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # A stalled client drops events rather than blocking everyone
+                pass
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+broker = EventBroker()
+
+
+class WorkbookWatcher(threading.Thread):
+    """Background mtime poller that refreshes the data service on change"""
+
+    def __init__(self, service=data_service, event_broker=broker, interval=WATCH_INTERVAL, history=None):
+        super().__init__(name='workbook-watcher', daemon=True)
+        self.service = service
+        self.broker = event_broker
+        self.interval = interval
+        self.history = history  # Optional HistoryStore that logs every new export
+        self._stop_event = threading.Event()
+        # Entries as of the last poll; API requests may reload the service in between
+        self._seen = {name: entry for name in service.datasets
+                      if (entry := service.peek(name)) is not None}
+
+    def check(self):
+        """Re-ingest every changed workbook once and publish its diff"""
+        for name in self.service.datasets:
+            path = self.service.path(name)
+            if not os.path.exists(path):
+                continue
+            old = self._seen.get(name)
+            if old is not None and old['version'] == file_key(path):
+                continue
+
+            new = self.service.get(name)
+            self._seen[name] = new
+            if old is None or new is old:
+                continue
+            diff = diff_sites(old['data'], new['data'])
+            self.broker.publish({
+                'dataset': name,
+                'rows': len(new['data']),
+                'timestamp': time.time(),
+                **diff
+            })
+            if self.history is not None:
+                self.history.ingest(name, new['data'], datetime.date.fromtimestamp(os.path.getmtime(path)))
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:  # Keep watching; a half-written file will parse next tick
+                print(f"⚠️  Workbook watcher error: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+stream_api = Blueprint('stream', __name__, url_prefix='/api')
+
+
+@stream_api.route('/stream')
+def stream():
+    """Server-Sent Events feed of added / removed / changed sites per dataset"""
+    q = broker.subscribe()
+
+    def events():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = q.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ': heartbeat\n\n'
+                    continue
+                yield f"event: change\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            broker.unsubscribe(q)
+
+    response = Response(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
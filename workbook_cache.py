@@ -0,0 +1,79 @@
+"""
+Workbook Cache
+Process-wide LRU cache of parsed workbooks and their analysis results
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+
+def file_key(file_path):
+    """Build a cache key from a path plus its mtime and size"""
+    stat = os.stat(file_path)
+    return ('file', os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+
+def content_key(digest):
+    """Build a cache key from the SHA-1 hex digest of uploaded bytes"""
+    return ('content', digest)
+
+
+class WorkbookCache:
+    """LRU cache holding a parsed DataFrame and computed results per workbook"""
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached entry ({'data', 'result'}) for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, data, result):
+        """Store a parsed DataFrame and its result, dropping stale versions of the same file"""
+        with self._lock:
+            # A new mtime/size for the same path replaces the old entry
+            for stale in [k for k in self._entries if k[:2] == key[:2] and k != key]:
+                del self._entries[stale]
+
+            self._entries[key] = {'data': data, 'result': result}
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Shared by every request handler in the process
+workbook_cache = WorkbookCache(max_entries=int(os.environ.get('WORKBOOK_CACHE_SIZE', 16)))